@@ -21,11 +21,14 @@ async def test_similarity():
     print("🔍 Debugging RAG Pipeline Similarity Scores")
     print("=" * 50)
     
+    embedding_service = None
     try:
         # Initialize services
+        # Query embeddings persist on disk, so reruns skip the Vertex AI calls
         embedding_service = EmbeddingService(
             project_id=os.getenv('GOOGLE_CLOUD_PROJECT'),
-            use_mock=False
+            use_mock=False,
+            cache_path="./data/embedding_cache/query_embeddings"
         )
         vector_store = VectorStore()
         
@@ -42,16 +45,20 @@ async def test_similarity():
             "urgent referral suspected cancer"
         ]
         
-        for query in test_queries:
+        # Embed all test queries in a single batched Vertex AI call
+        query_embeddings = await embedding_service.generate_embeddings_batch(
+            test_queries,
+            task_type="RETRIEVAL_QUERY",
+            batch_size=len(test_queries)
+        )
+        
+        # Search all queries at once with no threshold to see actual scores
+        batch_results = await vector_store.similarity_search_batch(query_embeddings, top_k=5)
+        
+        for query, query_embedding, results in zip(test_queries, query_embeddings, batch_results):
             print(f"\n🔍 Testing query: '{query}'")
-            
-            # Generate query embedding
-            query_embedding = await embedding_service.generate_query_embedding(query)
             print(f"   Query embedding: {len(query_embedding)} dimensions")
             
-            # Search with no threshold to see actual scores
-            results = await vector_store.similarity_search(query_embedding, top_k=5)
-            
             print(f"   Found {len(results)} results:")
             for i, result in enumerate(results):
                 print(f"   {i+1}. Score: {result.similarity_score:.6f}")
@@ -82,6 +89,9 @@ async def test_similarity():
         print(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        if embedding_service is not None:
+            embedding_service.close()
 
 if __name__ == "__main__":
     asyncio.run(test_similarity())
\ No newline at end of file
@@ -15,4 +15,5 @@ fi
 
 # Start the application
 echo "Starting Uvicorn server..."
-exec python -m uvicorn src.main:app --host 0.0.0.0 --port 8000
+exec python -m uvicorn src.main:app --host 0.0.0.0 --port 8000 \
+    --loop uvloop --http httptools --workers "${API_WORKERS:-1}"
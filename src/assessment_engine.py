@@ -2,21 +2,31 @@
 Assessment engine for the NG12 Cancer Risk Assessor.
 Provides clinical decision support logic for patient risk assessment.
 """
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any
-import re
+from collections import Counter
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Union
+
+import numpy as np
 
 from .models import (
     PatientRecord, AssessmentRequest, AssessmentResponse, 
     Citation, RetrievedChunk
 )
 from .rag_pipeline import RAGPipeline, RAGPipelineError
+from .embedding_service import EmbeddingServiceError
 from .patient_loader import PatientLoader, PatientLoaderError, PatientNotFoundError
 from .gemini_agent import GeminiAgent, GeminiAgentError
 
 
 logger = logging.getLogger(__name__)
 
+# Valid assessment classifications
+_VALID_ASSESSMENTS = frozenset(("Urgent Referral", "Urgent Investigation", "No Action"))
+
+# Confidence reaches its maximum once this many guideline chunks are found
+_CONFIDENCE_SATURATION = 5
+
 
 class AssessmentEngineError(Exception):
     """Custom exception for assessment engine errors."""
@@ -36,12 +46,16 @@ class AssessmentEngine:
         rag_pipeline: RAGPipeline,
         patient_loader: PatientLoader,
         gemini_agent: GeminiAgent,
-        default_top_k: int = 8
+        default_top_k: int = 8,
+        max_concurrency: int = 16
     ):
         self.rag_pipeline = rag_pipeline
         self.patient_loader = patient_loader
         self.gemini_agent = gemini_agent
         self.default_top_k = default_top_k
+        self._confidence_table = self._build_confidence_table()
+        # Shared by every batch so concurrent requests cannot flood Vertex AI
+        self._assess_semaphore = asyncio.Semaphore(max(max_concurrency, 1))
         
         # Inject loader into agent for Tool Use (Function Calling)
         self.gemini_agent.set_patient_loader(patient_loader)
@@ -51,65 +65,177 @@ class AssessmentEngine:
     async def assess_patient_risk(
         self,
         patient_id: str,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> AssessmentResponse:
         """
         Assess cancer risk for a patient based on their symptoms and NG12 guidelines.
         Uses Function Calling (Tools) to fetch patient data dynamically.
+        A query_embedding from embed_clinical_queries skips the per-patient embedding call.
         """
         try:
-            # 1. Fetch patient briefly just to get symptoms for RAG context building
-            # The agent will later fetch the full data via Tool Use
-            logger.info(f"Assessing patient risk for: {patient_id}")
             patient = await self.patient_loader.get_patient_by_id_async(patient_id)
+        except Exception as e:
+            raise self._wrap_assessment_error(patient_id, e)
+        return await self.assess_patient_record(patient, top_k, query_embedding)
+    
+    async def assess_patient_record(
+        self,
+        patient: PatientRecord,
+        top_k: Optional[int] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> AssessmentResponse:
+        """
+        Assess a patient whose record the caller has already looked up.
+        
+        Args:
+            patient: Patient record to assess
+            top_k: Number of guideline chunks to retrieve
+            query_embedding: Precomputed embedding of the patient's clinical query
             
-            # 2. Build clinical context (Guidelines) using RAG pipeline
-            k = top_k or self.default_top_k
-            clinical_context = await self.rag_pipeline.build_clinical_context(
-                patient_symptoms=patient.symptoms,
-                patient_demographics={
-                    "age": patient.age,
-                    "gender": patient.gender,
-                    "smoking_history": patient.smoking_history
-                },
-                top_k=k
-            )
-            
-            # 3. Generate clinical assessment using Gemini with Tool Use (Function Calling)
-            # We pass only the patient_id; the agent will call 'get_patient_data' tool
-            assessment_response = await self.gemini_agent.generate_clinical_assessment(
-                patient_id=patient_id,
-                guideline_context=clinical_context["guideline_context"]
-            )
+        Returns:
+            AssessmentResponse with the assessment, reasoning and citations
             
-            # 4. Parse the assessment response
-            parsed_assessment = self._parse_assessment_response(assessment_response)
+        Raises:
+            AssessmentEngineError: If the assessment fails
+        """
+        patient_id = patient.patient_id
+        try:
+            k = top_k or self.default_top_k
+            clinical_context = await self._build_clinical_context(patient, k, query_embedding)
+            assessment_response = await self._generate_assessment(patient_id, patient, clinical_context)
+            return self._build_assessment_result(patient_id, clinical_context, assessment_response)
             
-            # 5. Combine with RAG citations
-            all_citations = clinical_context["citations"]
+        except Exception as e:
+            raise self._wrap_assessment_error(patient_id, e)
+    
+    async def _prepare_assessment(
+        self,
+        patient_id: str,
+        top_k: int,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Tuple[PatientRecord, Dict[str, Any]]:
+        """Fetch the patient and build the guideline context for their assessment."""
+        # 1. Fetch patient to get symptoms for RAG context building
+        # The same record answers the agent's get_patient_data tool call
+        patient = await self.patient_loader.get_patient_by_id_async(patient_id)
+        return patient, await self._build_clinical_context(patient, top_k, query_embedding)
+    
+    async def _build_clinical_context(
+        self,
+        patient: PatientRecord,
+        top_k: int,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """Build the guideline context for a patient's assessment."""
+        logger.info(f"Assessing patient risk for: {patient.patient_id}")
+        
+        # 2. Build clinical context (Guidelines) using RAG pipeline
+        return await self.rag_pipeline.build_clinical_context(
+            patient_symptoms=patient.symptoms,
+            patient_demographics=self._patient_demographics(patient),
+            top_k=top_k,
+            query_embedding=query_embedding
+        )
+    
+    @staticmethod
+    def _patient_demographics(patient: PatientRecord) -> Dict[str, Any]:
+        """Demographics used to shape the guideline search query."""
+        return {
+            "age": patient.age,
+            "gender": patient.gender,
+            "smoking_history": patient.smoking_history
+        }
+    
+    async def embed_clinical_queries(self, patient_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Embed the guideline search queries of several patients in one batch.
+        
+        Unknown patients are skipped, so their assessment still fails with
+        PatientNotFoundError. If the batch call fails, an empty mapping is
+        returned and each assessment embeds its own query.
+        
+        Args:
+            patient_ids: List of patient identifiers
             
-            # Create final assessment response
-            assessment_result = AssessmentResponse(
-                patient_id=patient_id,
-                assessment=parsed_assessment["assessment"],
-                reasoning=parsed_assessment["reasoning"],
-                citations=all_citations,
-                confidence_score=self._calculate_confidence_score(
-                    clinical_context["num_relevant_guidelines"],
-                    parsed_assessment["assessment"]
+        Returns:
+            Mapping of patient ID to query embedding
+        """
+        queries: Dict[str, str] = {}
+        for patient_id in dict.fromkeys(patient_ids):
+            try:
+                patient = await self.patient_loader.get_patient_by_id_async(patient_id)
+            except PatientLoaderError:
+                continue
+            if patient.symptoms:
+                queries[patient_id] = self.rag_pipeline.build_clinical_query(
+                    patient.symptoms, self._patient_demographics(patient)
                 )
+        
+        if not queries:
+            return {}
+        
+        try:
+            embeddings = await self.rag_pipeline.embedding_service.generate_embeddings_batch(
+                list(queries.values()), task_type="RETRIEVAL_QUERY"
             )
-            
-            logger.info(f"Completed assessment for {patient_id}: {parsed_assessment['assessment']}")
-            return assessment_result
-            
-        except PatientNotFoundError:
+        except EmbeddingServiceError as e:
+            logger.warning(f"Batched query embedding failed, embedding per patient: {e}")
+            return {}
+        return dict(zip(queries, embeddings))
+    
+    async def _generate_assessment(
+        self,
+        patient_id: str,
+        patient: PatientRecord,
+        clinical_context: Dict[str, Any]
+    ) -> str:
+        """Generate the raw clinical assessment text with Gemini."""
+        # 3. Generate clinical assessment using Gemini with Tool Use (Function Calling)
+        # The agent calls the 'get_patient_data' tool, served from the prefetched record
+        return await self.gemini_agent.generate_clinical_assessment(
+            patient_id=patient_id,
+            guideline_context=clinical_context["guideline_context"],
+            patient=patient
+        )
+    
+    def _build_assessment_result(
+        self,
+        patient_id: str,
+        clinical_context: Dict[str, Any],
+        assessment_response: str
+    ) -> AssessmentResponse:
+        """Parse the Gemini response and combine it with the RAG citations."""
+        # 4. Parse the assessment response
+        parsed_assessment = self._parse_assessment_response(assessment_response)
+        
+        # 5. Combine with RAG citations
+        all_citations = clinical_context["citations"]
+        
+        # Create final assessment response
+        assessment_result = AssessmentResponse(
+            patient_id=patient_id,
+            assessment=parsed_assessment["assessment"],
+            reasoning=parsed_assessment["reasoning"],
+            citations=all_citations,
+            confidence_score=self._calculate_confidence_score(
+                clinical_context["num_relevant_guidelines"],
+                parsed_assessment["assessment"]
+            )
+        )
+        
+        logger.info(f"Completed assessment for {patient_id}: {parsed_assessment['assessment']}")
+        return assessment_result
+    
+    @staticmethod
+    def _wrap_assessment_error(patient_id: str, error: Exception) -> Exception:
+        """Map an assessment failure onto the exception raised to callers."""
+        if isinstance(error, (PatientNotFoundError, AssessmentEngineError)):
             # Re-raise PatientNotFoundError without wrapping
-            raise
-        except (PatientLoaderError, RAGPipelineError, GeminiAgentError) as e:
-            raise AssessmentEngineError(f"Failed to assess patient {patient_id}: {e}")
-        except Exception as e:
-            raise AssessmentEngineError(f"Unexpected error during assessment: {e}")
+            return error
+        if isinstance(error, (PatientLoaderError, RAGPipelineError, GeminiAgentError)):
+            return AssessmentEngineError(f"Failed to assess patient {patient_id}: {error}")
+        return AssessmentEngineError(f"Unexpected error during assessment: {error}")
     
     def _format_patient_data(self, patient: PatientRecord) -> str:
         """
@@ -156,36 +282,11 @@ Clinical Context:
         }
         
         try:
-            # Extract assessment classification
-            assessment_match = re.search(
-                r"Assessment:\s*(Urgent Referral|Urgent Investigation|No Action)",
-                response,
-                re.IGNORECASE
-            )
-            if assessment_match:
-                parsed["assessment"] = assessment_match.group(1)
-            
-            # Extract reasoning
-            reasoning_match = re.search(
-                r"Reasoning:\s*(.*?)(?=Citations:|$)",
-                response,
-                re.DOTALL | re.IGNORECASE
-            )
-            if reasoning_match:
-                parsed["reasoning"] = reasoning_match.group(1).strip()
-            
-            # Extract citations
-            citations_match = re.search(
-                r"Citations:\s*(.*?)$",
-                response,
-                re.DOTALL | re.IGNORECASE
-            )
-            if citations_match:
-                parsed["citations"] = citations_match.group(1).strip()
+            # Split the response into its sections in a single pass
+            parsed.update(GeminiAgent.parse_assessment(response))
             
             # Validate assessment classification
-            valid_assessments = ["Urgent Referral", "Urgent Investigation", "No Action"]
-            if parsed["assessment"] not in valid_assessments:
+            if parsed["assessment"] not in _VALID_ASSESSMENTS:
                 logger.warning(f"Invalid assessment classification: {parsed['assessment']}")
                 parsed["assessment"] = "No Action"
                 parsed["reasoning"] = f"Assessment classification was invalid. Original response: {response[:200]}..."
@@ -197,6 +298,27 @@ Clinical Context:
             parsed["reasoning"] = f"Failed to parse assessment response: {str(e)}"
             return parsed
     
+    @staticmethod
+    def _build_confidence_table() -> Dict[str, Tuple[float, ...]]:
+        """
+        Precompute confidence scores for every assessment and guideline count.
+        
+        Returns:
+            Mapping of assessment classification to scores indexed by
+            min(num_guidelines, _CONFIDENCE_SATURATION)
+        """
+        # Base confidence on number of relevant guidelines
+        base = [n / _CONFIDENCE_SATURATION for n in range(_CONFIDENCE_SATURATION + 1)]
+        
+        return {
+            # High confidence for urgent referrals (clear red flags)
+            "Urgent Referral": tuple(min(b + 0.2, 1.0) for b in base),
+            # Moderate confidence for investigations
+            "Urgent Investigation": tuple(base),
+            # Lower confidence for no action (absence of evidence)
+            "No Action": tuple(max(b - 0.1, 0.1) for b in base),
+        }
+    
     def _calculate_confidence_score(
         self,
         num_guidelines: int,
@@ -212,54 +334,141 @@ Clinical Context:
         Returns:
             Confidence score between 0.0 and 1.0
         """
-        # Base confidence on number of relevant guidelines
-        base_confidence = min(num_guidelines / 5.0, 1.0)  # Max confidence at 5+ guidelines
+        # Unrecognised classifications score like No Action
+        scores = self._confidence_table.get(assessment, self._confidence_table["No Action"])
+        return scores[min(num_guidelines, _CONFIDENCE_SATURATION)]
+    
+    async def iter_assessments(
+        self,
+        patient_ids: List[str],
+        top_k: Optional[int] = None,
+        concurrency: int = 8,
+        batch_embed: bool = True
+    ) -> AsyncIterator[Tuple[int, Union[AssessmentResponse, Exception]]]:
+        """
+        Assess multiple patients, yielding each result as soon as it is ready.
         
-        # Adjust based on assessment type
-        if assessment == "Urgent Referral":
-            # High confidence for urgent referrals (clear red flags)
-            return min(base_confidence + 0.2, 1.0)
-        elif assessment == "Urgent Investigation":
-            # Moderate confidence for investigations
-            return base_confidence
-        else:  # No Action
-            # Lower confidence for no action (absence of evidence)
-            return max(base_confidence - 0.1, 0.1)
+        Assessments flow through a three-stage pipeline connected by bounded
+        queues: patient fetch and guideline retrieval, the Gemini call, and
+        response parsing. Each stage runs ``concurrency`` workers, so retrieval
+        for upcoming patients overlaps with Gemini calls for earlier ones. Gemini
+        calls also hold the engine-wide assessment semaphore, which bounds the
+        Vertex AI fan-out across concurrent batches.
+        
+        Args:
+            patient_ids: List of patient identifiers
+            top_k: Number of guideline chunks to retrieve per patient
+            concurrency: Maximum number of concurrent tasks per stage
+            batch_embed: Embed every patient's guideline query in one request
+                before the pipeline starts. Streaming callers pass False so the
+                first result is not held back behind the whole batch's embeddings
+            
+        Yields:
+            (index, result) pairs in completion order, where result is the
+            AssessmentResponse for patient_ids[index] or the exception its
+            assessment raised
+        """
+        k = top_k or self.default_top_k
+        workers = max(concurrency, 1)
+        query_embeddings = await self.embed_clinical_queries(patient_ids) if batch_embed else {}
+        
+        pending: asyncio.Queue = asyncio.Queue()
+        prepared: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        generated: asyncio.Queue = asyncio.Queue(maxsize=workers)
+        completed: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(patient_ids):
+            pending.put_nowait(item)
+        
+        async def prepare_stage() -> None:
+            while True:
+                index, patient_id = await pending.get()
+                try:
+                    patient, context = await self._prepare_assessment(
+                        patient_id, k, query_embeddings.get(patient_id)
+                    )
+                    await prepared.put((index, patient_id, patient, context))
+                except Exception as e:
+                    completed.put_nowait((index, self._wrap_assessment_error(patient_id, e)))
+        
+        async def generate_stage() -> None:
+            while True:
+                index, patient_id, patient, context = await prepared.get()
+                try:
+                    async with self._assess_semaphore:
+                        response = await self._generate_assessment(patient_id, patient, context)
+                    await generated.put((index, patient_id, context, response))
+                except Exception as e:
+                    completed.put_nowait((index, self._wrap_assessment_error(patient_id, e)))
+        
+        async def parse_stage() -> None:
+            while True:
+                index, patient_id, context, response = await generated.get()
+                try:
+                    result = self._build_assessment_result(patient_id, context, response)
+                except Exception as e:
+                    result = self._wrap_assessment_error(patient_id, e)
+                completed.put_nowait((index, result))
+        
+        tasks = [asyncio.create_task(prepare_stage()) for _ in range(workers)]
+        tasks += [asyncio.create_task(generate_stage()) for _ in range(workers)]
+        tasks.append(asyncio.create_task(parse_stage()))
+        try:
+            for _ in patient_ids:
+                yield await completed.get()
+        finally:
+            # Also stops outstanding work when the consumer stops early
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
     
     async def assess_multiple_patients(
         self,
         patient_ids: List[str],
-        top_k: Optional[int] = None
-    ) -> List[AssessmentResponse]:
+        top_k: Optional[int] = None,
+        concurrency: int = 8,
+        return_exceptions: bool = False
+    ) -> List[Union[AssessmentResponse, Exception]]:
         """
         Assess multiple patients in batch.
         
         Args:
             patient_ids: List of patient identifiers
             top_k: Number of guideline chunks to retrieve per patient
+            concurrency: Maximum number of concurrent tasks per stage
+            return_exceptions: Return each failed assessment's exception in
+                place of its response instead of raising or substituting an
+                error response
             
         Returns:
-            List of AssessmentResponse objects
+            List of AssessmentResponse objects (or exceptions, with
+            return_exceptions) in the same order as patient_ids
+            
+        Raises:
+            PatientNotFoundError: If any patient does not exist
         """
-        assessments = []
+        results: List[Union[AssessmentResponse, Exception, None]] = [None] * len(patient_ids)
+        async for index, result in self.iter_assessments(patient_ids, top_k, concurrency):
+            results[index] = result
         
-        for patient_id in patient_ids:
-            try:
-                assessment = await self.assess_patient_risk(patient_id, top_k)
-                assessments.append(assessment)
-            except AssessmentEngineError as e:
-                logger.error(f"Failed to assess patient {patient_id}: {e}")
-                # Create error response
-                error_assessment = AssessmentResponse(
-                    patient_id=patient_id,
-                    assessment="No Action",
-                    reasoning=f"Assessment failed: {str(e)}",
-                    citations=[],
-                    confidence_score=0.0
-                )
-                assessments.append(error_assessment)
+        if return_exceptions:
+            return results
+        
+        for index, result in enumerate(results):
+            if not isinstance(result, Exception):
+                continue
+            if isinstance(result, PatientNotFoundError):
+                raise result
+            logger.error(f"Failed to assess patient {patient_ids[index]}: {result}")
+            # Create error response
+            results[index] = AssessmentResponse(
+                patient_id=patient_ids[index],
+                assessment="No Action",
+                reasoning=f"Assessment failed: {str(result)}",
+                citations=[],
+                confidence_score=0.0
+            )
         
-        return assessments
+        return results
     
     def get_assessment_statistics(self, assessments: List[AssessmentResponse]) -> Dict[str, Any]:
         """
@@ -274,31 +483,27 @@ Clinical Context:
         if not assessments:
             return {"total": 0}
         
-        # Count assessments by type
-        assessment_counts = {
-            "Urgent Referral": 0,
-            "Urgent Investigation": 0,
-            "No Action": 0
-        }
+        total = len(assessments)
         
-        total_confidence = 0.0
-        total_citations = 0
+        # Count assessments by type
+        assessment_counts = Counter(a.assessment for a in assessments)
         
-        for assessment in assessments:
-            assessment_counts[assessment.assessment] += 1
-            if assessment.confidence_score:
-                total_confidence += assessment.confidence_score
-            total_citations += len(assessment.citations)
+        confidences = np.fromiter(
+            (a.confidence_score or 0.0 for a in assessments), dtype=np.float64, count=total
+        )
+        citation_counts = np.fromiter(
+            (len(a.citations) for a in assessments), dtype=np.int64, count=total
+        )
         
         return {
-            "total": len(assessments),
+            "total": total,
             "urgent_referrals": assessment_counts["Urgent Referral"],
             "urgent_investigations": assessment_counts["Urgent Investigation"],
             "no_actions": assessment_counts["No Action"],
-            "average_confidence": total_confidence / len(assessments) if assessments else 0.0,
-            "average_citations": total_citations / len(assessments) if assessments else 0.0,
-            "referral_rate": assessment_counts["Urgent Referral"] / len(assessments) * 100,
-            "investigation_rate": assessment_counts["Urgent Investigation"] / len(assessments) * 100
+            "average_confidence": float(confidences.mean()),
+            "average_citations": float(citation_counts.mean()),
+            "referral_rate": assessment_counts["Urgent Referral"] / total * 100,
+            "investigation_rate": assessment_counts["Urgent Investigation"] / total * 100
         }
     
     async def validate_assessment_quality(
@@ -314,44 +519,25 @@ Clinical Context:
         Returns:
             Dictionary with validation results
         """
-        validation = {
-            "valid": True,
-            "issues": [],
-            "score": 1.0
-        }
+        valid_classification = assessment.assessment in _VALID_ASSESSMENTS
+        confidence = assessment.confidence_score
+        
+        # Each check is (failed, penalty, issue)
+        checks = (
+            (not valid_classification, 0.3, "Invalid assessment classification"),
+            (not assessment.reasoning or len(assessment.reasoning.strip()) < 20,
+             0.2, "Insufficient reasoning provided"),
+            (not assessment.citations, 0.3, "No citations provided"),
+            (any(not c.page or not c.excerpt for c in assessment.citations),
+             0.1, "Incomplete citation information"),
+            (confidence is None or not 0 <= confidence <= 1, 0.1, "Invalid confidence score"),
+        )
         
-        # Check assessment classification
-        valid_assessments = ["Urgent Referral", "Urgent Investigation", "No Action"]
-        if assessment.assessment not in valid_assessments:
-            validation["valid"] = False
-            validation["issues"].append("Invalid assessment classification")
-            validation["score"] -= 0.3
-        
-        # Check reasoning quality
-        if not assessment.reasoning or len(assessment.reasoning.strip()) < 20:
-            validation["issues"].append("Insufficient reasoning provided")
-            validation["score"] -= 0.2
-        
-        # Check citations
-        if not assessment.citations:
-            validation["issues"].append("No citations provided")
-            validation["score"] -= 0.3
-        else:
-            # Validate citation quality
-            for citation in assessment.citations:
-                if not citation.page or not citation.excerpt:
-                    validation["issues"].append("Incomplete citation information")
-                    validation["score"] -= 0.1
-                    break
-        
-        # Check confidence score
-        if assessment.confidence_score is None or assessment.confidence_score < 0 or assessment.confidence_score > 1:
-            validation["issues"].append("Invalid confidence score")
-            validation["score"] -= 0.1
-        
-        validation["score"] = max(validation["score"], 0.0)
-        
-        return validation
+        return {
+            "valid": valid_classification,
+            "issues": [issue for failed, _, issue in checks if failed],
+            "score": max(1.0 - sum(penalty for failed, penalty, _ in checks if failed), 0.0)
+        }
     
     async def health_check(self) -> Dict[str, Any]:
         """
@@ -366,16 +552,28 @@ Clinical Context:
         }
         
         try:
-            # Check RAG pipeline
-            rag_health = await self.rag_pipeline.health_check()
+            # Components are checked concurrently; a failing check is reported
+            # as unhealthy without cancelling the others
+            rag_health, patient_health, gemini_health = await asyncio.gather(
+                self.rag_pipeline.health_check(),
+                self.patient_loader.health_check(),
+                self.gemini_agent.health_check(),
+                return_exceptions=True
+            )
+            
+            if isinstance(rag_health, Exception):
+                logger.error(f"RAG pipeline health check failed: {rag_health}")
+                rag_health = {"pipeline_healthy": False, "error": str(rag_health)}
             health_status["components"]["rag_pipeline"] = rag_health
             
-            # Check patient loader
-            patient_health = await self.patient_loader.health_check()
+            if isinstance(patient_health, Exception):
+                logger.error(f"Patient loader health check failed: {patient_health}")
+                patient_health = False
             health_status["components"]["patient_loader"] = patient_health
             
-            # Check Gemini agent
-            gemini_health = await self.gemini_agent.health_check()
+            if isinstance(gemini_health, Exception):
+                logger.error(f"Gemini agent health check failed: {gemini_health}")
+                gemini_health = False
             health_status["components"]["gemini_agent"] = {
                 "healthy": gemini_health,
                 "model_info": self.gemini_agent.get_model_info()
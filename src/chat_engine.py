@@ -4,12 +4,199 @@ Chat Engine for conversational clinical guideline queries.
 This module provides session-managed chat functionality with context preservation
 and grounding to NG12 guidelines through the RAG pipeline.
 """
+import logging
+import time
 import uuid
-from datetime import datetime
-from typing import Dict, List, Optional
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AbstractSet, Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple, Union
 
-from .models import ChatResponse, Message, Citation
-from .rag_pipeline import RAGPipeline
+import numpy as np
+from cachetools import TTLCache
+
+from .models import ChatResponse, Message, Citation, GeneratedResponse, RetrievedChunk
+from .rag_pipeline import RAGPipeline, RAGPipelineError
+from .embedding_service import EmbeddingServiceError
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSession:
+    """
+    Bounded message history for a single chat session.
+    
+    Keeps the most recent messages in a fixed-size deque, so old messages
+    are dropped without copying the rest.
+    """
+    
+    def __init__(self, max_history: int):
+        self.messages: Deque[Message] = deque(maxlen=max_history)
+    
+    def append(self, message: Message) -> None:
+        """Append a message, dropping the oldest one when full."""
+        self.messages.append(message)
+    
+    def __len__(self) -> int:
+        return len(self.messages)
+
+
+class _ChatTurn:
+    """Cache lookup state carried from answering a message to caching the answer."""
+    
+    def __init__(self, corpus_version: int):
+        self.corpus_version = corpus_version
+        self.query_embedding: Optional[np.ndarray] = None
+        self.chunks: Optional[List[RetrievedChunk]] = None
+        self.response: Optional[GeneratedResponse] = None
+
+
+class SemanticResponseCache:
+    """
+    Ring buffer of recent query embeddings and the responses generated for them.
+    
+    A lookup returns the cached response whose query embedding has the highest
+    cosine similarity to the new query, provided it reaches the threshold, was
+    generated with the same top_k against the same corpus version and has not
+    expired. Before it is served, the candidate must also pass verify(): the
+    chunks retrieved for the new query have to overlap its citations by at
+    least evidence_threshold (Jaccard), so a similar-looking question that is
+    grounded in different guideline text still gets a fresh answer. Once full,
+    the oldest entry is overwritten.
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 1000,
+        threshold: float = 0.95,
+        ttl: float = 3600,
+        evidence_threshold: float = 0.8
+    ):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.evidence_threshold = evidence_threshold
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._keys: Optional[np.ndarray] = None
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._top_k = np.zeros(capacity, dtype=np.int32)
+        self._version = np.zeros(capacity, dtype=np.int64)
+        self._responses: List[Optional[GeneratedResponse]] = [None] * capacity
+        self._size = 0
+        self._next = 0
+    
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def get(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        version: int = 0
+    ) -> Optional[GeneratedResponse]:
+        """
+        Find a cached candidate response for a semantically equivalent query.
+        
+        Args:
+            query_embedding: Embedding of the new query
+            top_k: Number of chunks the response must have been generated with
+            version: Current corpus version; entries from other versions are ignored
+            
+        Returns:
+            Candidate GeneratedResponse to pass to verify(), or None if no entry
+            is similar enough
+        """
+        if self._size == 0:
+            self.misses += 1
+            return None
+        
+        scores = self._keys[:self._size] @ self._normalize(query_embedding)
+        stale = (
+            (time.monotonic() - self._created[:self._size] > self.ttl)
+            | (self._top_k[:self._size] != top_k)
+            | (self._version[:self._size] != version)
+        )
+        scores[stale] = -np.inf
+        
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        
+        return self._responses[best]
+    
+    def verify(self, candidate: GeneratedResponse, evidence_ids: AbstractSet[str]) -> bool:
+        """
+        Check that a candidate is grounded in the chunks retrieved for the new query.
+        
+        Args:
+            candidate: Response returned by get()
+            evidence_ids: Chunk IDs retrieved for the new query
+            
+        Returns:
+            True if the candidate may be served
+        """
+        cited_ids = {citation.chunk_id for citation in candidate.citations}
+        union = cited_ids | evidence_ids
+        overlap = len(cited_ids & evidence_ids) / len(union) if union else 1.0
+        
+        if overlap < self.evidence_threshold:
+            self.rejected += 1
+            return False
+        
+        self.hits += 1
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Dictionary with size, hits, misses, candidates rejected by the
+            evidence check and the hit rate
+        """
+        lookups = self.hits + self.misses + self.rejected
+        return {
+            "size": self._size,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected_by_evidence": self.rejected,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+    
+    def put(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int,
+        response: GeneratedResponse,
+        version: int = 0
+    ) -> None:
+        """Store a response, overwriting the oldest entry when full."""
+        if self.capacity <= 0:
+            return
+        
+        key = self._normalize(query_embedding)
+        if self._keys is None:
+            self._keys = np.zeros((self.capacity, key.shape[0]), dtype=np.float32)
+        
+        slot = self._next
+        self._keys[slot] = key
+        self._created[slot] = time.monotonic()
+        self._top_k[slot] = top_k
+        self._version[slot] = version
+        self._responses[slot] = response
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+    
+    def __len__(self) -> int:
+        return self._size
 
 
 class ChatEngine:
@@ -20,15 +207,41 @@ class ChatEngine:
     and ensures all responses are grounded in NG12 guidelines.
     """
     
-    def __init__(self, rag_pipeline: RAGPipeline):
+    # Number of most recent messages included in the conversation context
+    CONTEXT_WINDOW = 10
+    
+    def __init__(
+        self,
+        rag_pipeline: RAGPipeline,
+        max_sessions: int = 10_000,
+        session_ttl: int = 3600,
+        max_history: int = 50,
+        response_cache_size: int = 1000,
+        response_cache_threshold: float = 0.95
+    ):
         """
         Initialize the chat engine with a RAG pipeline.
         
         Args:
             rag_pipeline: Shared RAG pipeline for guideline retrieval
+            max_sessions: Maximum number of sessions kept in memory
+            session_ttl: Seconds of inactivity after which a session expires
+            max_history: Maximum number of messages retained per session
+            response_cache_size: Number of opening questions whose answers are
+                cached for reuse by rephrased questions (0 disables the cache)
+            response_cache_threshold: Minimum cosine similarity for a cached
+                answer to be reused
         """
         self.rag_pipeline = rag_pipeline
-        self.sessions: Dict[str, List[Message]] = {}
+        self.max_history = max_history
+        # Bounded session store: least recently used sessions are evicted when
+        # full, and sessions expire session_ttl seconds after their last message
+        self.sessions: TTLCache = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        self.response_cache = SemanticResponseCache(
+            capacity=response_cache_size,
+            threshold=response_cache_threshold,
+            ttl=session_ttl
+        )
     
     async def process_chat_message(
         self, 
@@ -47,38 +260,136 @@ class ChatEngine:
         Returns:
             ChatResponse: AI response with citations and metadata
         """
+        history, conversation_history = self._start_turn(session_id, message)
+        turn = await self._lookup_cached_response(history, message, top_k)
+        
+        if turn.response is None:
+            # Generate response using RAG pipeline
+            turn.response = await self.rag_pipeline.generate_chat_response(
+                query=message,
+                conversation_history=conversation_history,
+                top_k=top_k,
+                query_embedding=turn.query_embedding,
+                # Chunks fetched to verify a rejected candidate are reused
+                chunks=turn.chunks
+            )
+            self._cache_response(turn, top_k)
+        
+        return self._finish_turn(session_id, history, turn.response)
+    
+    async def stream_chat_message(
+        self,
+        session_id: str,
+        message: str,
+        top_k: int = 5
+    ) -> AsyncIterator[Union[str, ChatResponse]]:
+        """
+        Process a chat message, yielding the answer as it is generated.
+        
+        Session history and the semantic cache are handled as in
+        process_chat_message. A cached answer is yielded as a single fragment.
+        
+        Args:
+            session_id: Unique session identifier
+            message: User's chat message
+            top_k: Number of relevant chunks to retrieve
+            
+        Yields:
+            Answer text fragments, then the complete ChatResponse
+        """
+        history, conversation_history = self._start_turn(session_id, message)
+        turn = await self._lookup_cached_response(history, message, top_k)
+        
+        if turn.response is None:
+            async for item in self.rag_pipeline.stream_chat_response(
+                query=message,
+                conversation_history=conversation_history,
+                top_k=top_k,
+                query_embedding=turn.query_embedding,
+                chunks=turn.chunks
+            ):
+                if isinstance(item, GeneratedResponse):
+                    turn.response = item
+                else:
+                    yield item
+            self._cache_response(turn, top_k)
+        else:
+            yield turn.response.content
+        
+        yield self._finish_turn(session_id, history, turn.response)
+    
+    def _start_turn(self, session_id: str, message: str) -> Tuple[ChatSession, str]:
+        """Record the user's message and build the conversation context for it."""
         # Initialize session if it doesn't exist
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        history: Optional[ChatSession] = self.sessions.get(session_id)
+        if history is None:
+            history = ChatSession(self.max_history)
         
         # Add user message to session history
         user_message = Message(
             role="user",
             content=message,
-            timestamp=datetime.utcnow()
+            timestamp=datetime.now(timezone.utc)
         )
-        self.sessions[session_id].append(user_message)
+        history.append(user_message)
+        # (Re)assigning the session refreshes its TTL
+        self.sessions[session_id] = history
         
         # Build conversation context
-        conversation_history = self._build_conversation_context(session_id)
-        
-        # Generate response using RAG pipeline
-        response = await self.rag_pipeline.generate_chat_response(
-            query=message,
-            conversation_history=conversation_history,
-            top_k=top_k
-        )
+        return history, self._build_conversation_context(session_id)
+    
+    async def _lookup_cached_response(
+        self,
+        history: ChatSession,
+        message: str,
+        top_k: int
+    ) -> _ChatTurn:
+        """Serve an opening question from the semantic cache if a verified answer exists."""
+        # Only opening questions go through the semantic cache: later answers
+        # depend on the conversation so far
+        turn = _ChatTurn(corpus_version=self.rag_pipeline.vector_store.version)
+        if len(history) == 1 and self.response_cache.capacity > 0:
+            try:
+                turn.query_embedding = await self.rag_pipeline.embedding_service.generate_query_embedding(
+                    message.strip()
+                )
+                candidate = self.response_cache.get(turn.query_embedding, top_k, turn.corpus_version)
+                if candidate is not None:
+                    # Only reuse the answer if today's retrieval still backs it
+                    turn.chunks = await self.rag_pipeline.retrieve_relevant_chunks(
+                        message, top_k, query_embedding=turn.query_embedding
+                    )
+                    if self.response_cache.verify(candidate, {chunk.chunk_id for chunk in turn.chunks}):
+                        turn.response = candidate
+            except (EmbeddingServiceError, RAGPipelineError) as e:
+                logger.warning(f"Skipping chat response cache: {e}")
         
+        return turn
+    
+    def _cache_response(self, turn: _ChatTurn, top_k: int) -> None:
+        """Store a freshly generated opening answer in the semantic cache."""
+        # A mock answer standing in for a failed Gemini call must not be reused
+        if turn.query_embedding is not None and not turn.response.model_metadata.get("fallback"):
+            self.response_cache.put(turn.query_embedding, top_k, turn.response, turn.corpus_version)
+    
+    def _finish_turn(
+        self,
+        session_id: str,
+        history: ChatSession,
+        response: GeneratedResponse
+    ) -> ChatResponse:
+        """Record the assistant's answer and build the API response."""
         # Create assistant message
         assistant_message = Message(
             role="assistant",
             content=response.content,
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.now(timezone.utc),
             citations=response.citations
         )
         
         # Add assistant message to session history
-        self.sessions[session_id].append(assistant_message)
+        history.append(assistant_message)
+        self.sessions[session_id] = history
         
         return ChatResponse(
             session_id=session_id,
@@ -95,15 +406,16 @@ class ChatEngine:
             session_id: Unique session identifier
             
         Returns:
-            List[Message]: Complete conversation history
+            List[Message]: Retained conversation history (up to max_history messages)
             
         Raises:
             KeyError: If session doesn't exist
         """
-        if session_id not in self.sessions:
+        history = self.sessions.get(session_id)
+        if history is None:
             raise KeyError(f"Session {session_id} not found")
         
-        return self.sessions[session_id].copy()
+        return list(history.messages)
     
     def delete_session(self, session_id: str) -> bool:
         """
@@ -115,10 +427,7 @@ class ChatEngine:
         Returns:
             bool: True if session was deleted, False if not found
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            return True
-        return False
+        return self.sessions.pop(session_id, None) is not None
     
     def _build_conversation_context(self, session_id: str) -> str:
         """
@@ -130,11 +439,14 @@ class ChatEngine:
         Returns:
             str: Formatted conversation context
         """
-        if session_id not in self.sessions or not self.sessions[session_id]:
+        history = self.sessions.get(session_id)
+        if not history:
             return ""
         
+        # Last CONTEXT_WINDOW messages, read from the end of the deque
+        recent = list(islice(reversed(history.messages), self.CONTEXT_WINDOW))
         context_parts = []
-        for message in self.sessions[session_id][-10:]:  # Last 10 messages for context
+        for message in reversed(recent):
             role_prefix = "User" if message.role == "user" else "Assistant"
             context_parts.append(f"{role_prefix}: {message.content}")
         
@@ -147,8 +459,18 @@ class ChatEngine:
         Returns:
             List[str]: List of active session identifiers
         """
+        self.sessions.expire()
         return list(self.sessions.keys())
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get semantic response cache statistics.
+        
+        Returns:
+            Dictionary with cache size, hit/miss counters and hit rate
+        """
+        return self.response_cache.stats()
+    
     def get_session_count(self) -> int:
         """
         Get total number of active sessions.
@@ -156,4 +478,5 @@ class ChatEngine:
         Returns:
             int: Number of active sessions
         """
+        self.sessions.expire()
         return len(self.sessions)
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Google Cloud credential loading for the NG12 Cancer Risk Assessor.
+Parses the service account JSON from the environment once per process.
+"""
+import logging
+import os
+from functools import lru_cache
+from typing import Optional
+
+import orjson
+from google.oauth2 import service_account
+
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def load_service_account_credentials() -> Optional[service_account.Credentials]:
+    """
+    Load service account credentials from GOOGLE_SERVICE_ACCOUNT_JSON.
+    
+    The result is cached, so services constructed repeatedly share one
+    Credentials object instead of re-parsing the JSON each time.
+    
+    Returns:
+        Service account credentials, or None if the variable is not set
+        
+    Raises:
+        orjson.JSONDecodeError: If the variable does not contain valid JSON
+    """
+    service_account_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
+    if not service_account_json:
+        return None
+    
+    logger.info("Loading credentials from GOOGLE_SERVICE_ACCOUNT_JSON env var")
+    try:
+        info = orjson.loads(service_account_json)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Failed to parse GOOGLE_SERVICE_ACCOUNT_JSON: {e}")
+        raise
+    
+    return service_account.Credentials.from_service_account_info(info)
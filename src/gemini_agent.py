@@ -2,32 +2,129 @@
 Gemini 1.5 agent interface for the NG12 Cancer Risk Assessor.
 Provides clinical reasoning and chat response capabilities with both real and mock implementations.
 """
+import hashlib
 import logging
 import os
-from typing import List, Optional, Dict, Any
+import re
+import time
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Dict, Any, Tuple
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-import json
 import random
 
-from google.cloud import aiplatform
-from google.auth import default
-from google.auth.exceptions import DefaultCredentialsError
-from google.oauth2 import service_account
-import vertexai
-from vertexai.generative_models import (
-    GenerativeModel, 
-    GenerationConfig, 
-    SafetySetting, 
-    HarmCategory, 
-    HarmBlockThreshold,
-    Tool,
-    FunctionDeclaration
-)
+import orjson
+from cachetools import TTLCache
+
+from .models import PatientRecord
+
+# The Vertex AI SDK is slow to import, so it is only loaded once a real
+# (non-mock) agent needs it
+if TYPE_CHECKING:
+    from vertexai.generative_models import GenerationConfig, GenerativeModel, SafetySetting, Tool
 
 
 logger = logging.getLogger(__name__)
 
+# Seconds a tool result stays cached, per tool name. Patient records can be
+# reloaded, so they expire quickly; static reference data can live longer.
+_TOOL_CACHE_TTLS: Dict[str, float] = {
+    "get_patient_data": 300,
+}
+_TOOL_CACHE_SIZE = 1024
+_HEALTH_CHECK_TTL = 30.0
+
+# Sampling parameters and filtered harm categories shared by every request;
+# kept as plain values so they can be reported without importing the SDK
+_GENERATION_PARAMS: Dict[str, Any] = {
+    "temperature": 0.1,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+_SAFETY_CATEGORIES = (
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_HARASSMENT",
+)
+
+# Static prompt sections, built once instead of on every request
+_ASSESSMENT_HEADER = (
+    "You are a clinical decision support system based on NICE NG12 Cancer Guidelines.\n"
+    "Your role is to assess cancer risk and provide referral recommendations.\n"
+    "\n"
+    "CRITICAL INSTRUCTIONS:\n"
+    "1. Base ALL recommendations ONLY on the provided NG12 guideline content\n"
+    "2. Classify assessment as exactly one of: 'Urgent Referral', 'Urgent Investigation', or 'No Action'\n"
+    "3. Provide clear reasoning citing specific guideline sections\n"
+    "4. If insufficient evidence exists, state 'No Action' with explanation\n"
+    "5. Never make recommendations without corresponding NG12 citations\n"
+    "\n"
+    "PATIENT INFORMATION:\n"
+)
+_ASSESSMENT_FOOTER = (
+    "ASSESSMENT FORMAT:\n"
+    "Assessment: [Urgent Referral/Urgent Investigation/No Action]\n"
+    "Reasoning: [Detailed clinical reasoning based on NG12 guidelines]\n"
+    "Citations: [Specific page numbers and sections from NG12]\n"
+    "\n"
+    "Provide your assessment:"
+)
+_CHAT_HEADER = (
+    "You are a clinical guideline assistant based on NICE NG12 Cancer Guidelines.\n"
+    "Your role is to answer questions about cancer referral criteria and guidelines.\n"
+    "\n"
+    "CRITICAL INSTRUCTIONS:\n"
+    "1. Answer ONLY based on the provided NG12 guideline content\n"
+    "2. If information is not in the guidelines, state: 'I cannot find support in NG12 for that query'\n"
+    "3. Always include specific page numbers and section references\n"
+    "4. Provide relevant text excerpts from the guidelines\n"
+    "5. Never generate information not present in the provided context\n"
+    "\n"
+    "USER QUESTION:\n"
+)
+_CHAT_FOOTER = "Provide your response with specific NG12 citations:"
+_HISTORY_SECTION = "PREVIOUS CONVERSATION:\n{}\n\n"
+# Prompt for the tool-calling assessment; the model fetches the patient itself
+_TOOL_ASSESSMENT_TEMPLATE = (
+    "Task: Assess cancer risk for Patient ID: {patient_id}.\n"
+    "\n"
+    "Instructions:\n"
+    "1. Use the 'get_patient_data' tool to retrieve clinical details for this patient.\n"
+    "2. Analyze the retrieved data against the following NG12 guidelines:\n"
+    "\n"
+    "{guideline_context}\n"
+    "\n"
+    "3. Provide your final assessment strictly in this format:\n"
+    "\n"
+    "Assessment: [Urgent Referral / Urgent Investigation / No Action]\n"
+    "Reasoning: [Your clinical reasoning based on the guidelines]\n"
+    "Citations: [References to the specific guideline sections used]\n"
+)
+
+# Mock-mode keyword tables, matched in a single regex pass per call
+_URGENT_REFERRAL_RE = re.compile(r"hemoptysis|breast lump|haematuria")
+_URGENT_INVESTIGATION_RE = re.compile(r"persistent cough|hoarseness|dysphagia")
+# Trigger word -> canned chat answer, in priority order
+_MOCK_CHAT_RESPONSES: Dict[str, str] = {
+    "referral": "According to NG12 guidelines, urgent referral criteria include specific red flag symptoms and risk factors. The exact criteria depend on the suspected cancer type and patient presentation.",
+    "investigation": "NG12 outlines various investigation pathways including urgent investigations for patients with concerning symptoms that don't meet immediate referral criteria.",
+    "symptoms": "NG12 categorizes symptoms into red flag symptoms requiring urgent referral and other concerning symptoms requiring urgent investigation.",
+}
+_MOCK_CHAT_DEFAULT = "Based on the NG12 guidelines provided, I can help you understand the referral criteria and investigation pathways for suspected cancer."
+_MOCK_CHAT_TRIGGER_RE = re.compile("|".join(_MOCK_CHAT_RESPONSES))
+
+# Patterns for parsing assessment responses. Section labels are found anywhere
+# in the text (numbered lists, one-line answers), with optional markdown
+# emphasis such as "**Assessment:**"
+_ASSESSMENT_LABEL_RE = re.compile(
+    r"[*_]*\b(Assessment|Reasoning|Citations)[*_]*:[*_]*\s*",
+    re.IGNORECASE
+)
+_CLASSIFICATION_RE = re.compile(r"Urgent Referral|Urgent Investigation|No Action", re.IGNORECASE)
+_CLASSIFICATIONS = {name.lower(): name for name in ("Urgent Referral", "Urgent Investigation", "No Action")}
+# List numbering left at the end of a section by the next item's "2." prefix
+_SECTION_TAIL_RE = re.compile(r"(?:\n[ \t]*\d+[.)])?\s*$")
+
 
 class GeminiAgentError(Exception):
     """Custom exception for Gemini agent errors."""
@@ -39,59 +136,55 @@ class GeminiAgent:
     Gemini 1.5 agent with clinical reasoning and tool use capabilities.
     """
     
+    # Immutable SDK objects, identical for every agent; built on first use so
+    # the SDK is only imported when a real model is needed
+    _DEFAULT_CLINICAL_TOOLS: Optional["Tool"] = None
+    _DEFAULT_GENERATION_CONFIG: Optional["GenerationConfig"] = None
+    _DEFAULT_SAFETY_SETTINGS: Optional[Tuple["SafetySetting", ...]] = None
+    
     def __init__(
         self,
         project_id: Optional[str] = None,
         location: str = "us-central1",
         model_name: str = "gemini-2.5-flash",
-        use_mock: bool = False
+        use_mock: bool = False,
+        response_cache_size: int = 512,
+        response_cache_ttl: float = 3600
     ):
         self.project_id = project_id or os.getenv("GOOGLE_CLOUD_PROJECT")
         self.location = location or os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
         self.model_name = model_name or os.getenv("VERTEX_AI_MODEL", "gemini-2.5-flash")
         self.use_mock = use_mock or os.getenv("USE_MOCK_GEMINI", "false").lower() == "true"
         self._patient_loader = None # Will be set by engine
+        # Simulated latency for mock responses, off by default so tests and health checks are fast
+        self._mock_latency = os.getenv("MOCK_LATENCY", "false").lower() == "true"
         
         if not self.project_id:
             raise GeminiAgentError(
                 "Google Cloud project ID not found. Set GOOGLE_CLOUD_PROJECT environment variable."
             )
         
-        self._model: Optional[GenerativeModel] = None
-        self._executor = ThreadPoolExecutor(max_workers=2)
-        
-        # Define Tools (Function Calling)
-        self.get_patient_data_func = FunctionDeclaration(
-            name="get_patient_data",
-            description="Retrieve structured clinical data for a patient including age, symptoms, and duration.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "patient_id": {
-                        "type": "string",
-                        "description": "The unique identifier for the patient (e.g., 'PT-101')"
-                    }
-                },
-                "required": ["patient_id"]
-            },
-        )
-        self.clinical_tools = Tool(
-            function_declarations=[self.get_patient_data_func],
-        )
-
-        self.generation_config = GenerationConfig(
-            temperature=0.1,
-            top_p=0.8,
-            top_k=40,
-            max_output_tokens=2048
-        )
-        
-        self.safety_settings = [
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_HATE_SPEECH, threshold=HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, threshold=HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, threshold=HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_HARASSMENT, threshold=HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE)
-        ]
+        # Built lazily by _get_model and reused across requests
+        self._model_notools: Optional["GenerativeModel"] = None
+        self._model_tools: Optional["GenerativeModel"] = None
+        self._model_ping: Optional["GenerativeModel"] = None
+        self._last_health: Tuple[float, bool] = (float("-inf"), False)
+        self._tool_caches: Dict[str, TTLCache] = {
+            name: TTLCache(maxsize=_TOOL_CACHE_SIZE, ttl=ttl)
+            for name, ttl in _TOOL_CACHE_TTLS.items()
+        }
+        # Loader records the tool caches were filled from; a reload swaps them
+        self._tool_cache_source: Optional[Any] = None
+        # Generated chat text keyed by prompt hash; clinical assessments are never cached
+        self._response_cache = TTLCache(maxsize=response_cache_size, ttl=response_cache_ttl)
+        # In-flight generations keyed by prompt hash, shared by identical concurrent requests
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        # Running token totals reported by Gemini, for cost tracking
+        self._token_usage: Dict[str, int] = {
+            "prompt_token_count": 0,
+            "candidates_token_count": 0,
+            "total_token_count": 0,
+        }
         
         if not self.use_mock:
             self._initialize_vertex_ai()
@@ -99,27 +192,109 @@ class GeminiAgent:
     def set_patient_loader(self, loader):
         """Inject patient loader for tool execution."""
         self._patient_loader = loader
+        self._reset_models()
+    
+    def _reset_models(self) -> None:
+        """Drop cached model instances so they are rebuilt with the current configuration."""
+        self._model_notools = None
+        self._model_tools = None
+        self._model_ping = None
+    
+    @classmethod
+    def _default_clinical_tools(cls) -> "Tool":
+        """Function-calling tools exposed to the model, shared by all agents."""
+        if cls._DEFAULT_CLINICAL_TOOLS is None:
+            from vertexai.generative_models import FunctionDeclaration, Tool
+            
+            # Define Tools (Function Calling)
+            get_patient_data_func = FunctionDeclaration(
+                name="get_patient_data",
+                description="Retrieve structured clinical data for a patient including age, symptoms, and duration.",
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "patient_id": {
+                            "type": "string",
+                            "description": "The unique identifier for the patient (e.g., 'PT-101')"
+                        }
+                    },
+                    "required": ["patient_id"]
+                },
+            )
+            cls._DEFAULT_CLINICAL_TOOLS = Tool(function_declarations=[get_patient_data_func])
+        return cls._DEFAULT_CLINICAL_TOOLS
+    
+    @classmethod
+    def _default_generation_config(cls) -> "GenerationConfig":
+        """Sampling configuration shared by all agents."""
+        if cls._DEFAULT_GENERATION_CONFIG is None:
+            from vertexai.generative_models import GenerationConfig
+            
+            cls._DEFAULT_GENERATION_CONFIG = GenerationConfig(**_GENERATION_PARAMS)
+        return cls._DEFAULT_GENERATION_CONFIG
+    
+    @classmethod
+    def _default_safety_settings(cls) -> Tuple["SafetySetting", ...]:
+        """Safety filters shared by all agents."""
+        if cls._DEFAULT_SAFETY_SETTINGS is None:
+            from vertexai.generative_models import HarmBlockThreshold, HarmCategory, SafetySetting
+            
+            cls._DEFAULT_SAFETY_SETTINGS = tuple(
+                SafetySetting(category=getattr(HarmCategory, category), threshold=HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE)
+                for category in _SAFETY_CATEGORIES
+            )
+        return cls._DEFAULT_SAFETY_SETTINGS
+    
+    @property
+    def clinical_tools(self) -> "Tool":
+        """Function-calling tools exposed to the model."""
+        return self._default_clinical_tools()
+    
+    @property
+    def generation_config(self) -> "GenerationConfig":
+        """Sampling configuration used for every request."""
+        return self._default_generation_config()
+    
+    @property
+    def safety_settings(self) -> Tuple["SafetySetting", ...]:
+        """Safety filters applied to every request."""
+        return self._default_safety_settings()
 
     def _initialize_vertex_ai(self) -> None:
         """Initialize Vertex AI with proper authentication."""
         try:
-            credentials = None
-            service_account_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
-            if service_account_json:
-                info = json.loads(service_account_json)
-                credentials = service_account.Credentials.from_service_account_info(info)
+            from google.cloud import aiplatform
+            import vertexai
             
-            aiplatform.init(project=self.project_id, location=self.location, credentials=credentials)
-            vertexai.init(project=self.project_id, location=self.location, credentials=credentials)
+            from .credentials import load_service_account_credentials
+            
+            # Parsed once per process and shared with the embedding service
+            credentials = load_service_account_credentials()
+            
+            # gRPC transport: prompts and patient payloads are sent as protobuf, not JSON
+            aiplatform.init(project=self.project_id, location=self.location, credentials=credentials, api_transport="grpc")
+            vertexai.init(project=self.project_id, location=self.location, credentials=credentials, api_transport="grpc")
             logger.info(f"Initialized Vertex AI for Gemini in project {self.project_id}")
             
         except Exception as e:
             logger.warning(f"Failed to initialize Vertex AI, falling back to mock mode: {e}")
             self.use_mock = True
     
-    def _get_model(self, with_tools: bool = False) -> GenerativeModel:
+    def _get_model(self, with_tools: bool = False) -> "GenerativeModel":
         """Get or create the Gemini model instance."""
-        tools = [self.clinical_tools] if with_tools else None
+        if with_tools:
+            if self._model_tools is None:
+                self._model_tools = self._build_model(tools=[self.clinical_tools])
+            return self._model_tools
+        
+        if self._model_notools is None:
+            self._model_notools = self._build_model()
+        return self._model_notools
+    
+    def _build_model(self, tools: Optional[List["Tool"]] = None) -> "GenerativeModel":
+        """Construct a Gemini model with the agent's generation and safety settings."""
+        from vertexai.generative_models import GenerativeModel
+        
         return GenerativeModel(
             model_name=self.model_name,
             generation_config=self.generation_config,
@@ -130,38 +305,46 @@ class GeminiAgent:
     async def generate_clinical_assessment(
         self,
         patient_id: str,
-        guideline_context: str
+        guideline_context: str,
+        patient: Optional[PatientRecord] = None,
+        fast_path: bool = True
     ) -> str:
         """
         Generate clinical assessment using tool use to fetch patient data.
+        
+        Args:
+            patient_id: Patient identifier passed to the model
+            guideline_context: Retrieved NG12 guideline content
+            patient: Record already fetched by the caller; the get_patient_data
+                tool is answered from it instead of looking the patient up again
+            fast_path: Embed the patient data in the prompt and make a single
+                call without tools, instead of letting the model request it
+                through get_patient_data (one extra round trip)
         """
+        # Resolved once and shared by the mock, fast, tool and fallback paths
+        patient_data = self._cached_get_patient(patient_id, patient)
+        
         if self.use_mock:
-            # For mock, we still manually fetch to simulate the tool's result
-            patient = self._patient_loader.get_patient_by_id(patient_id)
-            return await self._generate_mock_clinical_assessment(str(patient.dict()), guideline_context)
+            # For mock, the fetched record simulates the tool's result
+            return await self._generate_mock_clinical_assessment(orjson.dumps(patient_data).decode(), guideline_context)
         
         try:
+            if fast_path:
+                prompt = self._build_clinical_assessment_prompt(
+                    orjson.dumps(patient_data).decode(), guideline_context
+                )
+                # Every assessment is a fresh model call, never a cached answer
+                return await self._generate_response(prompt, self._prompt_key(prompt), use_cache=False)
+            
             model = self._get_model(with_tools=True)
             chat = model.start_chat()
             
-            prompt = f"""
-            Task: Assess cancer risk for Patient ID: {patient_id}.
-            
-            Instructions:
-            1. Use the 'get_patient_data' tool to retrieve clinical details for this patient.
-            2. Analyze the retrieved data against the following NG12 guidelines:
-            
-            {guideline_context}
-            
-            3. Provide your final assessment strictly in this format:
-            
-            Assessment: [Urgent Referral / Urgent Investigation / No Action]
-            Reasoning: [Your clinical reasoning based on the guidelines]
-            Citations: [References to the specific guideline sections used]
-            """
+            prompt = _TOOL_ASSESSMENT_TEMPLATE.format(
+                patient_id=patient_id, guideline_context=guideline_context
+            )
             
             # 1. Initial request to Gemini
-            response = chat.send_message(prompt)
+            response = await chat.send_message_async(prompt)
             
             # 2. Handle Function Calling Loop
             # In a production app, this would be a loop to handle multiple calls
@@ -172,15 +355,15 @@ class GeminiAgent:
                     p_id = args["patient_id"]
                     
                     logger.info(f"Agent triggered tool: get_patient_data for {p_id}")
-                    patient_data = self._patient_loader.get_patient_by_id(p_id)
+                    tool_data = patient_data if p_id == patient_id else self._cached_get_patient(p_id)
                     
                     # 3. Send tool result back to Gemini
-                    from vertexai.generative_models import Content, Part
-                    response = chat.send_message(
+                    from vertexai.generative_models import Part
+                    response = await chat.send_message_async(
                         Part.from_function_response(
                             name="get_patient_data",
                             response={
-                                "content": patient_data.dict(),
+                                "content": tool_data,
                             }
                         )
                     )
@@ -190,13 +373,151 @@ class GeminiAgent:
         except Exception as e:
             logger.error(f"Clinical assessment generation failed: {e}")
             # Fallback to mock on error
-            patient_data = self._patient_loader.get_patient_by_id(patient_id)
-            return await self._generate_mock_clinical_assessment(str(patient_data.dict()), guideline_context)
-    async def generate_chat_response(
+            return await self._generate_mock_clinical_assessment(orjson.dumps(patient_data).decode(), guideline_context)
+    
+    @staticmethod
+    def parse_assessment(text: str) -> Dict[str, str]:
+        """
+        Split an assessment response into its sections in a single regex pass.
+        
+        The classification is the first "Assessment:" label followed directly
+        by a valid classification. Reasoning runs from the first "Reasoning:"
+        label to the next "Citations:" label, and citations run to the end.
+        
+        Args:
+            text: Response in the "Assessment: / Reasoning: / Citations:" format
+            
+        Returns:
+            Dictionary with the "assessment", "reasoning" and "citations" sections
+            that were found; the assessment is reduced to its canonical
+            classification
+        """
+        parsed: Dict[str, str] = {}
+        reasoning_start: Optional[int] = None
+        reasoning_end: Optional[int] = None
+        citations_start: Optional[int] = None
+        
+        for label in _ASSESSMENT_LABEL_RE.finditer(text):
+            section = label.group(1).lower()
+            if section == "assessment":
+                if "assessment" not in parsed:
+                    # Extract assessment classification
+                    classification = _CLASSIFICATION_RE.match(text, label.end())
+                    if classification:
+                        parsed["assessment"] = _CLASSIFICATIONS[classification.group(0).lower()]
+            elif section == "reasoning":
+                if reasoning_start is None:
+                    reasoning_start = label.end()
+            else:
+                if citations_start is None:
+                    citations_start = label.end()
+                if reasoning_start is not None and reasoning_end is None:
+                    reasoning_end = label.start()
+        
+        if reasoning_start is not None:
+            reasoning = text[reasoning_start:reasoning_end]
+            parsed["reasoning"] = _SECTION_TAIL_RE.sub("", reasoning).strip()
+        if citations_start is not None:
+            parsed["citations"] = text[citations_start:].strip()
+        return parsed
+    
+    def _cached_get_patient(
+        self,
+        patient_id: str,
+        patient: Optional[PatientRecord] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the get_patient_data tool through its TTL cache.
+        
+        A prefetched record whose ID matches is always used as is, so the model
+        sees the same data the caller holds. The caches are cleared whenever the
+        patient loader has reloaded its records.
+        
+        Args:
+            patient_id: Patient identifier requested by the model
+            patient: Record already fetched by the caller
+            
+        Returns:
+            JSON-safe patient record, ready to send back as the tool response
+        """
+        if self._patient_loader is not None:
+            source = self._patient_loader.cached_patients
+            if source is not self._tool_cache_source:
+                for tool_cache in self._tool_caches.values():
+                    tool_cache.clear()
+                self._tool_cache_source = source
+        
+        cache = self._tool_caches["get_patient_data"]
+        if patient is None or patient.patient_id != patient_id:
+            patient_data = cache.get(patient_id)
+            if patient_data is not None:
+                return patient_data
+            patient = self._patient_loader.get_patient_by_id(patient_id)
+        
+        # JSON-mode dump so dates etc. are already JSON types for the SDK; unset
+        # and default fields are dropped to keep the prompt payload small
+        patient_data = patient.model_dump(mode="json", exclude_none=True, exclude_defaults=True)
+        cache[patient_id] = patient_data
+        return patient_data
+    
+    async def generate_chat_response_stream(
         self,
         user_query: str,
         guideline_context: str,
         conversation_history: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat response as Gemini generates it.
+        
+        A response already in the response cache is yielded whole, and a
+        completed stream is stored there for generate_chat_response. Unlike
+        generate_chat_response there is no mock fallback, because text may
+        already have reached the caller when the stream fails.
+        
+        Args:
+            user_query: User's question about guidelines
+            guideline_context: Retrieved NG12 guideline content
+            conversation_history: Previous conversation context
+            
+        Yields:
+            Response text fragments in generation order
+            
+        Raises:
+            GeminiAgentError: If the stream fails or produces no text
+        """
+        if self.use_mock:
+            yield await self._generate_mock_chat_response(user_query, guideline_context)
+            return
+        
+        prompt = self._build_chat_response_prompt(
+            user_query, guideline_context, conversation_history
+        )
+        
+        key = self._prompt_key(prompt)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        fragments = []
+        try:
+            async for text in self._stream_response(prompt):
+                fragments.append(text)
+                yield text
+        except Exception as e:
+            raise GeminiAgentError(f"Chat response stream failed: {e}")
+        
+        text = "".join(fragments).strip()
+        if not text:
+            raise GeminiAgentError("Empty response from Gemini model")
+        self._response_cache[key] = text
+    
+    async def generate_chat_response(
+        self,
+        user_query: str,
+        guideline_context: str,
+        conversation_history: Optional[str] = None,
+        use_cache: bool = True
     ) -> str:
         """
         Generate chat response for clinical guideline queries.
@@ -205,49 +526,110 @@ class GeminiAgent:
             user_query: User's question about guidelines
             guideline_context: Retrieved NG12 guideline content
             conversation_history: Previous conversation context
+            use_cache: Set to False to always call the model for a fresh response
             
         Returns:
             Chat response with evidence grounding
+        """
+        response, _ = await self.generate_chat_response_with_fallback(
+            user_query, guideline_context, conversation_history, use_cache
+        )
+        return response
+    
+    async def generate_chat_response_with_fallback(
+        self,
+        user_query: str,
+        guideline_context: str,
+        conversation_history: Optional[str] = None,
+        use_cache: bool = True
+    ) -> Tuple[str, bool]:
+        """
+        Generate a chat response and report whether the mock stood in for Gemini.
+        
+        Args:
+            user_query: User's question about guidelines
+            guideline_context: Retrieved NG12 guideline content
+            conversation_history: Previous conversation context
+            use_cache: Set to False to always call the model for a fresh response
             
-        Raises:
-            GeminiAgentError: If chat response generation fails
+        Returns:
+            Tuple of the chat response, and whether it is the mock response
+            substituted for a failed model call
         """
         if self.use_mock:
-            return await self._generate_mock_chat_response(user_query, guideline_context)
+            return await self._generate_mock_chat_response(user_query, guideline_context), False
         
         try:
             prompt = self._build_chat_response_prompt(
                 user_query, guideline_context, conversation_history
             )
             
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                self._executor,
-                self._generate_response_sync,
-                prompt
-            )
+            key = self._prompt_key(prompt)
+            
+            if not use_cache:
+                return await self._generate_response(prompt, key, use_cache=False), False
+            
+            # Single-flight: identical concurrent prompts await the first caller's call
+            future = self._inflight.get(key)
+            if future is not None:
+                return await asyncio.shield(future), False
             
-            return response
+            future = asyncio.ensure_future(self._generate_response(prompt, key))
+            self._inflight[key] = future
+            try:
+                return await asyncio.shield(future), False
+            finally:
+                self._inflight.pop(key, None)
             
         except Exception as e:
             logger.error(f"Chat response generation failed, falling back to mock: {e}")
-            return await self._generate_mock_chat_response(user_query, guideline_context)
+            return await self._generate_mock_chat_response(user_query, guideline_context), True
     
-    def _generate_response_sync(self, prompt: str) -> str:
-        """Synchronous response generation."""
-        model = self._get_model()
+    @staticmethod
+    def _prompt_key(prompt: str) -> bytes:
+        """Hash a prompt into the key used by the response cache and in-flight map."""
+        return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    
+    async def _generate_response(self, prompt: str, key: bytes, use_cache: bool = True) -> str:
+        """
+        Generate a response with the async client.
+        
+        With use_cache the response is served from, and stored in, the response
+        cache; without it the model is always called and nothing is stored.
+        """
+        if use_cache:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                return cached
         
         try:
-            response = model.generate_content(prompt)
+            text = "".join([fragment async for fragment in self._stream_response(prompt)]).strip()
             
-            if not response.text:
+            if not text:
                 raise GeminiAgentError("Empty response from Gemini model")
             
-            return response.text.strip()
+            if use_cache:
+                self._response_cache[key] = text
+            return text
             
         except Exception as e:
             raise GeminiAgentError(f"Failed to generate response: {e}")
     
+    async def _stream_response(self, prompt: str) -> AsyncIterator[str]:
+        """Stream response text for a prompt, recording token usage from the final chunk."""
+        model = self._get_model()
+        usage = None
+        
+        async for chunk in await model.generate_content_async(prompt, stream=True):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.candidates and chunk.candidates[0].content.parts:
+                yield chunk.text
+        
+        if usage is not None:
+            for field in self._token_usage:
+                self._token_usage[field] += getattr(usage, field, 0)
+    
     def _build_clinical_assessment_prompt(
         self,
         patient_data: str,
@@ -255,42 +637,12 @@ class GeminiAgent:
         conversation_history: Optional[str] = None
     ) -> str:
         """Build prompt for clinical assessment."""
-        prompt_parts = [
-            "You are a clinical decision support system based on NICE NG12 Cancer Guidelines.",
-            "Your role is to assess cancer risk and provide referral recommendations.",
-            "",
-            "CRITICAL INSTRUCTIONS:",
-            "1. Base ALL recommendations ONLY on the provided NG12 guideline content",
-            "2. Classify assessment as exactly one of: 'Urgent Referral', 'Urgent Investigation', or 'No Action'",
-            "3. Provide clear reasoning citing specific guideline sections",
-            "4. If insufficient evidence exists, state 'No Action' with explanation",
-            "5. Never make recommendations without corresponding NG12 citations",
-            "",
-            "PATIENT INFORMATION:",
-            patient_data,
-            "",
-            "RELEVANT NG12 GUIDELINES:",
-            guideline_context,
-            ""
-        ]
-        
-        if conversation_history:
-            prompt_parts.extend([
-                "PREVIOUS CONVERSATION:",
-                conversation_history,
-                ""
-            ])
-        
-        prompt_parts.extend([
-            "ASSESSMENT FORMAT:",
-            "Assessment: [Urgent Referral/Urgent Investigation/No Action]",
-            "Reasoning: [Detailed clinical reasoning based on NG12 guidelines]",
-            "Citations: [Specific page numbers and sections from NG12]",
-            "",
-            "Provide your assessment:"
-        ])
-        
-        return "\n".join(prompt_parts)
+        history = _HISTORY_SECTION.format(conversation_history) if conversation_history else ""
+        return (
+            f"{_ASSESSMENT_HEADER}{patient_data}\n\n"
+            f"RELEVANT NG12 GUIDELINES:\n{guideline_context}\n\n"
+            f"{history}{_ASSESSMENT_FOOTER}"
+        )
     
     def _build_chat_response_prompt(
         self,
@@ -299,37 +651,12 @@ class GeminiAgent:
         conversation_history: Optional[str] = None
     ) -> str:
         """Build prompt for chat response."""
-        prompt_parts = [
-            "You are a clinical guideline assistant based on NICE NG12 Cancer Guidelines.",
-            "Your role is to answer questions about cancer referral criteria and guidelines.",
-            "",
-            "CRITICAL INSTRUCTIONS:",
-            "1. Answer ONLY based on the provided NG12 guideline content",
-            "2. If information is not in the guidelines, state: 'I cannot find support in NG12 for that query'",
-            "3. Always include specific page numbers and section references",
-            "4. Provide relevant text excerpts from the guidelines",
-            "5. Never generate information not present in the provided context",
-            "",
-            "USER QUESTION:",
-            user_query,
-            "",
-            "RELEVANT NG12 GUIDELINES:",
-            guideline_context,
-            ""
-        ]
-        
-        if conversation_history:
-            prompt_parts.extend([
-                "PREVIOUS CONVERSATION:",
-                conversation_history,
-                ""
-            ])
-        
-        prompt_parts.extend([
-            "Provide your response with specific NG12 citations:"
-        ])
-        
-        return "\n".join(prompt_parts)
+        history = _HISTORY_SECTION.format(conversation_history) if conversation_history else ""
+        return (
+            f"{_CHAT_HEADER}{user_query}\n\n"
+            f"RELEVANT NG12 GUIDELINES:\n{guideline_context}\n\n"
+            f"{history}{_CHAT_FOOTER}"
+        )
     
     async def _generate_mock_clinical_assessment(
         self,
@@ -341,10 +668,10 @@ class GeminiAgent:
         symptoms_lower = patient_data.lower()
         
         # Mock assessment logic based on common cancer symptoms
-        if any(symptom in symptoms_lower for symptom in ["hemoptysis", "breast lump", "haematuria"]):
+        if _URGENT_REFERRAL_RE.search(symptoms_lower):
             assessment = "Urgent Referral"
             reasoning = "Patient presents with red flag symptoms that require urgent specialist assessment according to NG12 guidelines."
-        elif any(symptom in symptoms_lower for symptom in ["persistent cough", "hoarseness", "dysphagia"]):
+        elif _URGENT_INVESTIGATION_RE.search(symptoms_lower):
             assessment = "Urgent Investigation"
             reasoning = "Patient has persistent symptoms that warrant urgent investigation to rule out malignancy."
         else:
@@ -352,7 +679,8 @@ class GeminiAgent:
             reasoning = "Current symptoms do not meet NG12 criteria for urgent referral or investigation at this time."
         
         # Add some randomness to make it more realistic
-        await asyncio.sleep(random.uniform(0.5, 1.5))
+        if self._mock_latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5))
         
         mock_response = f"""Assessment: {assessment}
 Reasoning: {reasoning} Based on the provided NG12 guideline context, the patient's symptoms and risk factors have been evaluated against established referral criteria.
@@ -368,18 +696,16 @@ Citations: [MOCK] NG12 PDF, Pages 15-18, Section 1.2.3 - Referral criteria for s
         """Generate mock chat response for development/testing."""
         query_lower = user_query.lower()
         
-        # Mock responses based on common queries
-        if "referral" in query_lower:
-            response = "According to NG12 guidelines, urgent referral criteria include specific red flag symptoms and risk factors. The exact criteria depend on the suspected cancer type and patient presentation."
-        elif "investigation" in query_lower:
-            response = "NG12 outlines various investigation pathways including urgent investigations for patients with concerning symptoms that don't meet immediate referral criteria."
-        elif "symptoms" in query_lower:
-            response = "NG12 categorizes symptoms into red flag symptoms requiring urgent referral and other concerning symptoms requiring urgent investigation."
-        else:
-            response = "Based on the NG12 guidelines provided, I can help you understand the referral criteria and investigation pathways for suspected cancer."
+        # Mock responses based on common queries; the highest-priority trigger wins
+        triggers = set(_MOCK_CHAT_TRIGGER_RE.findall(query_lower))
+        response = next(
+            (text for word, text in _MOCK_CHAT_RESPONSES.items() if word in triggers),
+            _MOCK_CHAT_DEFAULT
+        )
         
         # Add some randomness to make it more realistic
-        await asyncio.sleep(random.uniform(0.3, 1.0))
+        if self._mock_latency:
+            await asyncio.sleep(random.uniform(0.3, 1.0))
         
         mock_response = f"""{response}
 
@@ -401,35 +727,51 @@ Please note: This is a mock response for development purposes. The actual system
             "project_id": self.project_id,
             "location": self.location,
             "use_mock": self.use_mock,
-            "temperature": getattr(self.generation_config, 'temperature', 0.1),
-            "max_output_tokens": getattr(self.generation_config, 'max_output_tokens', 2048),
-            "safety_settings_count": len(self.safety_settings)
+            "temperature": _GENERATION_PARAMS["temperature"],
+            "max_output_tokens": _GENERATION_PARAMS["max_output_tokens"],
+            "safety_settings_count": len(_SAFETY_CATEGORIES),
+            "token_usage": dict(self._token_usage)
         }
     
     async def health_check(self) -> bool:
         """
-        Perform a health check by generating a test response.
+        Perform a health check with a one-token ping to the model.
+        
+        The result is cached for _HEALTH_CHECK_TTL seconds so frequent liveness
+        probes do not repeat the request.
         
         Returns:
             True if service is healthy, False otherwise
         """
+        checked_at, healthy = self._last_health
+        now = time.monotonic()
+        if now - checked_at < _HEALTH_CHECK_TTL:
+            return healthy
+        
         try:
             if self.use_mock:
                 # Mock health check
-                await asyncio.sleep(0.1)
-                return True
-            
-            test_response = await self.generate_chat_response(
-                user_query="Health check test",
-                guideline_context="Test guideline content for health check"
-            )
-            return bool(test_response and len(test_response) > 0)
+                if self._mock_latency:
+                    await asyncio.sleep(0.1)
+                healthy = True
+            else:
+                response = await self._get_ping_model().generate_content_async("ping")
+                healthy = bool(response.candidates)
             
         except Exception as e:
             logger.error(f"Gemini health check failed: {e}")
-            return False
+            healthy = False
+        
+        self._last_health = (now, healthy)
+        return healthy
     
-    def __del__(self):
-        """Cleanup resources."""
-        if hasattr(self, '_executor'):
-            self._executor.shutdown(wait=False)
\ No newline at end of file
+    def _get_ping_model(self) -> "GenerativeModel":
+        """Get or create a model limited to one output token, for health checks."""
+        if self._model_ping is None:
+            from vertexai.generative_models import GenerationConfig, GenerativeModel
+            
+            self._model_ping = GenerativeModel(
+                model_name=self.model_name,
+                generation_config=GenerationConfig(temperature=0, max_output_tokens=1)
+            )
+        return self._model_ping
@@ -5,21 +5,26 @@ This module provides the main API endpoints for patient assessment and chat func
 with proper error handling, CORS configuration, and static file serving.
 """
 import os
+import time
 import uuid
 import logging
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type, TypeVar
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
+import orjson
 import uvicorn
 from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
 
 from .models import (
-    AssessmentRequest, AssessmentResponse, ChatRequest, ChatResponse,
+    AssessmentRequest, AssessmentResponse, BatchAssessmentRequest, ChatRequest, ChatResponse,
     ChatHistoryResponse, StatusResponse, HealthResponse, ErrorResponse
 )
 from .assessment_engine import AssessmentEngine, AssessmentEngineError
@@ -36,19 +41,17 @@ load_dotenv()
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Global variables for shared components
-rag_pipeline: Optional[RAGPipeline] = None
-assessment_engine: Optional[AssessmentEngine] = None
-chat_engine: Optional[ChatEngine] = None
+# Pre-serialized /health body, refreshed at most once per _HEALTH_REFRESH_SECONDS
+_HEALTH_REFRESH_SECONDS = 1.0
+_health_cache = {"ts": float("-inf"), "body": b""}
 
+_BodyModel = TypeVar("_BodyModel", bound=BaseModel)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan manager for initializing shared components.
     """
-    global rag_pipeline, assessment_engine, chat_engine
-    
     try:
         # Initialize core components
         print("Initializing NG12 Cancer Risk Assessor...")
@@ -90,21 +93,36 @@ async def lifespan(app: FastAPI):
             embedding_service=embedding_service,
             gemini_agent=gemini_agent
         )
+        # Open backend connections and load the index before taking traffic
+        warmup_seconds = sum((await rag_pipeline.warmup()).values())
+        print(f"✓ Warmed up RAG pipeline in {warmup_seconds:.2f}s")
         
         # Initialize patient loader
         patient_loader = PatientLoader(
             data_file_path=os.getenv("PATIENT_DATA_PATH", "./data/patients.json")
         )
+        # Load patient records now so the first request does not pay for it
+        print(f"✓ Loaded {patient_loader.prime_cache()} patient records")
         
         # Initialize assessment engine
         assessment_engine = AssessmentEngine(
             rag_pipeline=rag_pipeline,
             patient_loader=patient_loader,
-            gemini_agent=gemini_agent
+            gemini_agent=gemini_agent,
+            max_concurrency=int(os.getenv("ASSESS_MAX_CONCURRENCY", "16"))
         )
         
         # Initialize chat engine
-        chat_engine = ChatEngine(rag_pipeline=rag_pipeline)
+        chat_engine = ChatEngine(
+            rag_pipeline=rag_pipeline,
+            max_sessions=int(os.getenv("CHAT_SESSION_CAP", "10000")),
+            session_ttl=int(os.getenv("CHAT_SESSION_TTL", "3600"))
+        )
+        
+        # Shared components are bound to the app and injected into endpoints
+        app.state.rag_pipeline = rag_pipeline
+        app.state.assessment_engine = assessment_engine
+        app.state.chat_engine = chat_engine
         
         print("✓ All components initialized successfully")
         
@@ -123,7 +141,8 @@ app = FastAPI(
     title="NG12 Cancer Risk Assessor",
     description="Clinical reasoning agent for cancer risk assessment using NICE NG12 guidelines",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -135,18 +154,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON bodies (assessment reasoning, citation excerpts) for clients that accept gzip;
+# NDJSON streams opt out so lines are not buffered
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=4)
+
+
+# Dependencies
+def get_assessment_engine(request: Request) -> AssessmentEngine:
+    """Resolve the assessment engine bound to the app at startup."""
+    engine = getattr(request.app.state, "assessment_engine", None)
+    if engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Assessment engine not initialized"
+        )
+    return engine
+
+
+def get_chat_engine(request: Request) -> ChatEngine:
+    """Resolve the chat engine bound to the app at startup."""
+    engine = getattr(request.app.state, "chat_engine", None)
+    if engine is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Chat engine not initialized"
+        )
+    return engine
+
+
+def _json_body(model: Type[_BodyModel]) -> Callable[[Request], Any]:
+    """
+    Build a dependency that validates the raw request body against a model.
+    
+    The body bytes go straight into pydantic-core with model_validate_json,
+    instead of being decoded to Python objects first and validated after.
+    
+    Args:
+        model: Pydantic model describing the JSON body
+        
+    Returns:
+        Async dependency returning the validated model instance
+    """
+    async def parse(request: Request) -> _BodyModel:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+    
+    return parse
+
+
+def _json_body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Describe a body parsed by _json_body in the OpenAPI schema."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}}
+        }
+    }
+
 
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with structured error responses."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error_code": f"HTTP_{exc.status_code}",
             "message": exc.detail,
-            "timestamp": datetime.utcnow().isoformat(),  # Convert to string!
-            "request_id": str(uuid.uuid4())
+            "timestamp": datetime.now(timezone.utc).isoformat(),  # Convert to string!
+            "request_id": uuid.uuid4().hex
         }
     )
 
@@ -154,14 +234,14 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions with structured error responses."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error_code": "INTERNAL_SERVER_ERROR",
             "message": "An unexpected error occurred",
             "details": {"exception_type": type(exc).__name__},
-            "timestamp": datetime.utcnow().isoformat(),  # Convert to string!
-            "request_id": str(uuid.uuid4())
+            "timestamp": datetime.now(timezone.utc).isoformat(),  # Convert to string!
+            "request_id": uuid.uuid4().hex
         }
     )
 
@@ -175,19 +255,23 @@ async def health_check():
     Returns:
         HealthResponse: Service health status and metadata
     """
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
-    }
+    now = time.monotonic()
+    if now - _health_cache["ts"] > _HEALTH_REFRESH_SECONDS:
+        _health_cache["body"] = orjson.dumps({
+            "status": "healthy",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version": "1.0.0"
+        })
+        _health_cache["ts"] = now
+    return Response(content=_health_cache["body"], media_type="application/json")
 
 
 # Test endpoint for debugging patient not found
 @app.post("/test-patient-error")
-async def test_patient_error():
+async def test_patient_error(engine: AssessmentEngine = Depends(get_assessment_engine)):
     """Test endpoint to debug patient not found error."""
     try:
-        patient = await assessment_engine.patient_loader.get_patient_by_id_async("INVALID-ID")
+        patient = await engine.patient_loader.get_patient_by_id_async("INVALID-ID")
         return {"found": True}
     except PatientNotFoundError as e:
         raise HTTPException(
@@ -202,8 +286,11 @@ async def test_patient_error():
 
 
 # Patient assessment endpoint
-@app.post("/assess")
-async def assess_patient(request: AssessmentRequest):
+@app.post("/assess", openapi_extra=_json_body_openapi(AssessmentRequest))
+async def assess_patient(
+    request: AssessmentRequest = Depends(_json_body(AssessmentRequest)),
+    engine: AssessmentEngine = Depends(get_assessment_engine)
+):
     """
     Assess cancer risk for a patient based on their symptoms and NG12 guidelines.
     
@@ -216,15 +303,16 @@ async def assess_patient(request: AssessmentRequest):
     Raises:
         HTTPException: If patient not found or assessment fails
     """
-    if not assessment_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Assessment engine not initialized"
-        )
-    
     try:
-        result = await assessment_engine.assess_patient_risk(request.patient_id)
-        return result
+        # Records are primed at startup, so look the patient up directly and
+        # only go through the loader if the cache has been cleared
+        patients = engine.patient_loader.cached_patients
+        if patients is None:
+            return await engine.assess_patient_risk(request.patient_id)
+        patient = patients.get(request.patient_id)
+        if patient is None:
+            raise PatientNotFoundError(f"Patient with ID '{request.patient_id}' not found")
+        return await engine.assess_patient_record(patient)
     except PatientNotFoundError:  # Catch specific exception
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -244,45 +332,88 @@ async def assess_patient(request: AssessmentRequest):
 
 
 # Batch assessment endpoint
-@app.post("/assess/batch")
-async def assess_multiple_patients(patient_ids: List[str]):
+@app.post("/assess/batch", openapi_extra=_json_body_openapi(BatchAssessmentRequest))
+async def assess_multiple_patients(
+    request: BatchAssessmentRequest = Depends(_json_body(BatchAssessmentRequest)),
+    accept: Optional[str] = Header(default=None),
+    engine: AssessmentEngine = Depends(get_assessment_engine)
+):
     """
     Assess multiple patients in batch.
     
+    Patients go through the engine's batch pipeline, with Gemini calls
+    bounded by ASSESS_MAX_CONCURRENCY across all requests.
+    A failure for one patient does not fail the batch; its entry carries an
+    error code instead. Clients sending ``Accept: application/x-ndjson`` get
+    one JSON line per patient as soon as it completes.
+    
     Args:
-        patient_ids: List of patient IDs to assess
+        request: Batch request with the patient IDs to assess (a bare list
+            of IDs is also accepted)
+        accept: Accept header, used to select NDJSON streaming
         
     Returns:
-        List of assessment responses
+        List with an assessment response or error entry per patient, in order,
+        or an NDJSON stream of the same entries in completion order
         
     Raises:
         HTTPException: If assessment engine not available
     """
-    if not assessment_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Assessment engine not initialized"
-        )
-    
+    patient_ids = request.patient_ids
     if not patient_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Patient IDs list cannot be empty"
         )
     
-    try:
-        results = await assessment_engine.assess_multiple_patients(patient_ids)
-        return results
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Batch assessment failed: {str(e)}"
+    if accept and "application/x-ndjson" in accept:
+        return StreamingResponse(
+            _stream_batch_entries(engine, patient_ids),
+            media_type="application/x-ndjson",
+            # GZipMiddleware passes responses that are already encoded through
+            # untouched, so each line reaches the client as soon as it is written
+            headers={"Content-Encoding": "identity"}
         )
+    
+    results = await engine.assess_multiple_patients(patient_ids, return_exceptions=True)
+    return [
+        _batch_error_entry(patient_id, result) if isinstance(result, Exception) else result
+        for patient_id, result in zip(patient_ids, results)
+    ]
+
+
+async def _stream_batch_entries(engine: AssessmentEngine, patient_ids: List[str]) -> AsyncIterator[bytes]:
+    """Yield each batch entry as an NDJSON line in completion order."""
+    # Each patient's query is embedded in its own pipeline stage rather than
+    # in one up-front request, which would delay the first line
+    async for index, result in engine.iter_assessments(patient_ids, batch_embed=False):
+        if isinstance(result, Exception):
+            entry = _batch_error_entry(patient_ids[index], result)
+        else:
+            entry = result.model_dump(mode="json")
+        yield orjson.dumps(entry) + b"\n"
+
+
+def _batch_error_entry(patient_id: str, error: Exception) -> Dict[str, Any]:
+    """Build the batch result entry for a patient whose assessment failed."""
+    if isinstance(error, PatientNotFoundError):
+        status_code = status.HTTP_404_NOT_FOUND
+        message = f"Patient not found: {patient_id}"
+    else:
+        logger.error(f"Batch assessment failed for {patient_id}: {type(error).__name__}: {error}")
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        message = f"Assessment failed: {str(error)}"
+    
+    return {
+        "patient_id": patient_id,
+        "error_code": f"HTTP_{status_code}",
+        "message": message
+    }
 
 
 # Assessment statistics endpoint
 @app.get("/assess/stats")
-async def get_assessment_stats():
+async def get_assessment_stats(engine: AssessmentEngine = Depends(get_assessment_engine)):
     """
     Get assessment engine statistics and health information.
     
@@ -292,20 +423,14 @@ async def get_assessment_stats():
     Raises:
         HTTPException: If assessment engine not available
     """
-    if not assessment_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Assessment engine not initialized"
-        )
-    
     try:
-        stats = assessment_engine.get_engine_stats()
-        health = await assessment_engine.health_check()
+        stats = engine.get_engine_stats()
+        health = await engine.health_check()
         
         return {
             "engine_stats": stats,
             "health_status": health,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
         raise HTTPException(
@@ -315,28 +440,40 @@ async def get_assessment_stats():
 
 
 # Chat message endpoint
-@app.post("/chat", response_model=ChatResponse)
-async def chat_message(request: ChatRequest):
+@app.post("/chat", response_model=ChatResponse, openapi_extra=_json_body_openapi(ChatRequest))
+async def chat_message(
+    request: ChatRequest = Depends(_json_body(ChatRequest)),
+    accept: Optional[str] = Header(default=None),
+    engine: ChatEngine = Depends(get_chat_engine)
+):
     """
     Process a chat message about NG12 guidelines.
     
+    Clients sending ``Accept: application/x-ndjson`` get the answer as it is
+    generated: one ``{"delta": ...}`` line per text fragment, then a final
+    line with the complete ChatResponse (or an error entry if the answer
+    fails part-way).
+    
     Args:
         request: Chat request with session ID and message
+        accept: Accept header, used to select NDJSON streaming
         
     Returns:
-        ChatResponse: AI response with citations
+        ChatResponse: AI response with citations, or an NDJSON stream
         
     Raises:
         HTTPException: If chat processing fails
     """
-    if not chat_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Chat engine not initialized"
+    if accept and "application/x-ndjson" in accept:
+        return StreamingResponse(
+            _stream_chat_lines(engine, request),
+            media_type="application/x-ndjson",
+            # Bypass GZipMiddleware so each fragment is flushed as it arrives
+            headers={"Content-Encoding": "identity"}
         )
     
     try:
-        response = await chat_engine.process_chat_message(
+        response = await engine.process_chat_message(
             session_id=request.session_id,
             message=request.message,
             top_k=request.top_k
@@ -349,9 +486,46 @@ async def chat_message(request: ChatRequest):
         )
 
 
+async def _stream_chat_lines(engine: ChatEngine, request: ChatRequest) -> AsyncIterator[bytes]:
+    """Yield a streamed chat answer as NDJSON lines."""
+    try:
+        async for item in engine.stream_chat_message(
+            session_id=request.session_id,
+            message=request.message,
+            top_k=request.top_k
+        ):
+            if isinstance(item, ChatResponse):
+                yield orjson.dumps(item.model_dump(mode="json")) + b"\n"
+            else:
+                yield orjson.dumps({"delta": item}) + b"\n"
+    except Exception as e:
+        # Headers are already sent, so the failure is reported in the stream
+        logger.error(f"Chat stream failed for session {request.session_id}: {type(e).__name__}: {e}")
+        yield orjson.dumps({
+            "session_id": request.session_id,
+            "error_code": f"HTTP_{status.HTTP_500_INTERNAL_SERVER_ERROR}",
+            "message": f"Chat processing failed: {str(e)}"
+        }) + b"\n"
+
+
+# Chat response cache statistics endpoint
+@app.get("/chat/cache/stats")
+async def get_chat_cache_stats(engine: ChatEngine = Depends(get_chat_engine)):
+    """
+    Get semantic response cache statistics for the chat engine.
+    
+    Returns:
+        Dictionary with cache size, hit/miss counters and hit rate
+    """
+    return engine.get_cache_stats()
+
+
 # Chat history endpoint
 @app.get("/chat/{session_id}/history", response_model=ChatHistoryResponse)
-async def get_chat_history(session_id: str):
+async def get_chat_history(
+    session_id: str,
+    engine: ChatEngine = Depends(get_chat_engine)
+):
     """
     Retrieve conversation history for a chat session.
     
@@ -364,14 +538,8 @@ async def get_chat_history(session_id: str):
     Raises:
         HTTPException: If session not found
     """
-    if not chat_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Chat engine not initialized"
-        )
-    
     try:
-        messages = chat_engine.get_session_history(session_id)
+        messages = engine.get_session_history(session_id)
         return ChatHistoryResponse(
             session_id=session_id,
             messages=messages
@@ -385,7 +553,10 @@ async def get_chat_history(session_id: str):
 
 # Delete chat session endpoint
 @app.delete("/chat/{session_id}", response_model=StatusResponse)
-async def delete_chat_session(session_id: str):
+async def delete_chat_session(
+    session_id: str,
+    engine: ChatEngine = Depends(get_chat_engine)
+):
     """
     Delete a chat session and clear its history.
     
@@ -395,13 +566,7 @@ async def delete_chat_session(session_id: str):
     Returns:
         StatusResponse: Deletion status
     """
-    if not chat_engine:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Chat engine not initialized"
-        )
-    
-    success = chat_engine.delete_session(session_id)
+    success = engine.delete_session(session_id)
     
     if success:
         return StatusResponse(
@@ -415,15 +580,25 @@ async def delete_chat_session(session_id: str):
         )
 
 
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets browsers and CDNs cache assets for a day."""
+    
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
+
+
 # Mount static files for frontend (if frontend directory exists)
 if os.path.exists("frontend"):
-    app.mount("/static", StaticFiles(directory="frontend"), name="static")
-    
+    app.mount("/static", CachedStaticFiles(directory="frontend"), name="static")
+
+if os.path.isfile("frontend/index.html"):
     @app.get("/")
     async def serve_frontend():
         """Serve the main frontend page."""
-        from fastapi.responses import FileResponse
-        return FileResponse("frontend/index.html")
+        # no-cache: browsers revalidate, so a redeploy is picked up immediately
+        return FileResponse("frontend/index.html", headers={"Cache-Control": "no-cache"})
 
 
 if __name__ == "__main__":
@@ -431,11 +606,17 @@ if __name__ == "__main__":
     host = os.getenv("API_HOST", "0.0.0.0")
     port = int(os.getenv("API_PORT", "8000"))
     debug = os.getenv("DEBUG", "false").lower() == "true"
+    # Chat sessions and response caches live in process memory, so extra
+    # workers need sticky routing; keep a single worker unless asked otherwise
+    workers = 1 if debug else int(os.getenv("API_WORKERS", "1"))
     
     uvicorn.run(
         "src.main:app",
         host=host,
         port=port,
         reload=debug,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
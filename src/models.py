@@ -2,18 +2,21 @@
 Data models for the NG12 Cancer Risk Assessor.
 """
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class PatientRecord(BaseModel):
     """Patient data model matching the requirements."""
+    # Records are shared read-only across requests once loaded
+    model_config = ConfigDict(frozen=True)
+    
     patient_id: str
     name: str
     age: int
     gender: str
     smoking_history: str
-    symptoms: List[str]
+    symptoms: Tuple[str, ...]
     symptom_duration_days: int
 
 
@@ -40,6 +43,19 @@ class AssessmentRequest(BaseModel):
     patient_id: str
 
 
+class BatchAssessmentRequest(BaseModel):
+    """Request model for batch patient assessment."""
+    patient_ids: List[str]
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _accept_bare_list(cls, data: Any) -> Any:
+        # Earlier clients post the list of IDs on its own
+        if isinstance(data, list):
+            return {"patient_ids": data}
+        return data
+
+
 class AssessmentResponse(BaseModel):
     """Response model for patient assessment."""
     patient_id: str
@@ -58,8 +74,6 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Response model for chat messages."""
-    model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
-    
     session_id: str
     answer: str
     citations: List[Citation]
@@ -68,8 +82,6 @@ class ChatResponse(BaseModel):
 
 class Message(BaseModel):
     """Message model for chat history."""
-    model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
-    
     role: str = Field(description="user | assistant")
     content: str
     timestamp: datetime
@@ -90,8 +102,6 @@ class StatusResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response."""
-    model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
-    
     status: str
     timestamp: datetime
     version: str = "1.0.0"
@@ -124,8 +134,6 @@ class TextChunk(BaseModel):
 
 class ErrorResponse(BaseModel):
     """Error response model."""
-    model_config = ConfigDict(json_encoders={datetime: lambda v: v.isoformat()})
-    
     error_code: str
     message: str
     details: Optional[Dict[str, Any]] = None
@@ -2,16 +2,33 @@
 Patient data loader for the NG12 Cancer Risk Assessor.
 Handles loading and validation of patient data from JSON files.
 """
-import json
+import asyncio
+import hashlib
 import logging
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Any
+
+import orjson
+from pydantic import TypeAdapter, ValidationError
 
 from .models import PatientRecord
 
 
 logger = logging.getLogger(__name__)
 
+# Validates the whole patient list in one call into pydantic-core
+_PATIENTS_ADAPTER = TypeAdapter(List[PatientRecord])
+
+# Bumped whenever the layout of the snapshot file changes
+_SNAPSHOT_FORMAT_VERSION = 1
+# Snapshots are loaded without validation, so they are only trusted for the
+# exact PatientRecord schema they were written with
+_SNAPSHOT_SCHEMA = hashlib.blake2b(
+    orjson.dumps(PatientRecord.model_json_schema(), option=orjson.OPT_SORT_KEYS), digest_size=16
+).hexdigest()
+
 
 class PatientLoaderError(Exception):
     """Custom exception for patient loader errors."""
@@ -44,14 +61,17 @@ class PatientLoader:
             data_file_path: Path to the JSON file containing patient data
         """
         self.data_file_path = Path(data_file_path)
-        self._patients_cache: Optional[Dict[str, PatientRecord]] = None
+        # Pre-validated JSON copy of the patient list, rebuilt whenever the source
+        # changes; loading it skips validation but not JSON parsing
+        self.snapshot_path = self.data_file_path.with_suffix('.snapshot.json')
+        self._patients_cache: Optional[Mapping[str, PatientRecord]] = None
         
-    def _load_patients_data(self) -> Dict[str, PatientRecord]:
+    def _load_patients_data(self) -> Mapping[str, PatientRecord]:
         """
         Load and validate patient data from the JSON file.
         
         Returns:
-            Dictionary mapping patient IDs to PatientRecord objects
+            Read-only mapping of interned patient IDs to PatientRecord objects
             
         Raises:
             PatientLoaderError: If file cannot be read or data is invalid
@@ -60,34 +80,107 @@ class PatientLoader:
         try:
             if not self.data_file_path.exists():
                 raise PatientLoaderError(f"Patient data file not found: {self.data_file_path}")
+            
+            raw = self.data_file_path.read_bytes()
+            source_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+            snapshot = self._load_snapshot(source_hash)
+            if snapshot is not None:
+                return snapshot
                 
-            with open(self.data_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = orjson.loads(raw)
                 
             if 'patients' not in data:
                 raise PatientLoaderError("Invalid JSON structure: missing 'patients' key")
                 
-            patients_dict = {}
-            for patient_data in data['patients']:
-                try:
-                    # Validate patient data using Pydantic model
-                    patient = PatientRecord(**patient_data)
-                    patients_dict[patient.patient_id] = patient
-                except Exception as e:
-                    raise PatientDataValidationError(
-                        f"Invalid patient data for ID {patient_data.get('patient_id', 'unknown')}: {e}"
-                    )
+            try:
+                # Validate patient data using Pydantic model
+                records = _PATIENTS_ADAPTER.validate_python(data['patients'])
+            except ValidationError as e:
+                loc = e.errors()[0]['loc']
+                patient_id = 'unknown'
+                if loc and isinstance(loc[0], int) and isinstance(data['patients'][loc[0]], dict):
+                    patient_id = data['patients'][loc[0]].get('patient_id', 'unknown')
+                raise PatientDataValidationError(
+                    f"Invalid patient data for ID {patient_id} at {loc}: {e}"
+                )
+            
+            patients_dict = {sys.intern(patient.patient_id): patient for patient in records}
+            self._write_snapshot(records, source_hash)
                     
             logger.info(f"Successfully loaded {len(patients_dict)} patients from {self.data_file_path}")
-            return patients_dict
+            return MappingProxyType(patients_dict)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise PatientLoaderError(f"Invalid JSON in patient data file: {e}")
         except Exception as e:
             if isinstance(e, PatientLoaderError):
                 raise
             raise PatientLoaderError(f"Unexpected error loading patient data: {e}")
     
+    def _load_snapshot(self, source_hash: str) -> Optional[Mapping[str, PatientRecord]]:
+        """
+        Load patients from the pre-validated snapshot, skipping validation.
+        
+        The snapshot is still JSON and is parsed with orjson like the patient
+        file itself; what it saves is the pydantic validation pass, since the
+        records are built with model_construct.
+        
+        Args:
+            source_hash: Digest of the current patient file contents
+            
+        Returns:
+            Read-only mapping of patient IDs to records, or None if the snapshot
+            is missing, unreadable, or was written from different file contents,
+            a different PatientRecord schema or snapshot format
+        """
+        try:
+            snapshot = orjson.loads(self.snapshot_path.read_bytes())
+            if (
+                snapshot.get('format') != _SNAPSHOT_FORMAT_VERSION
+                or snapshot.get('schema') != _SNAPSHOT_SCHEMA
+                or snapshot.get('source_hash') != source_hash
+            ):
+                return None
+            rows = snapshot['patients']
+            patients_dict = {
+                sys.intern(row['patient_id']): PatientRecord.model_construct(
+                    **{**row, 'symptoms': tuple(row['symptoms'])}
+                )
+                for row in rows
+            }
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError, AttributeError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable patient snapshot {self.snapshot_path}: {e}")
+            return None
+        
+        logger.info(f"Loaded {len(patients_dict)} patients from snapshot {self.snapshot_path}")
+        return MappingProxyType(patients_dict)
+    
+    def _write_snapshot(self, records: List[PatientRecord], source_hash: str) -> None:
+        """
+        Persist validated records so the next start can skip validation.
+        
+        Args:
+            records: Patient records that have passed schema validation
+            source_hash: Digest of the patient file contents they came from
+        """
+        snapshot = {
+            'format': _SNAPSHOT_FORMAT_VERSION,
+            'schema': _SNAPSHOT_SCHEMA,
+            'source_hash': source_hash,
+            'patients': _PATIENTS_ADAPTER.dump_python(records, mode='json'),
+        }
+        try:
+            self.snapshot_path.write_bytes(orjson.dumps(snapshot))
+        except OSError as e:
+            logger.warning(f"Could not write patient snapshot {self.snapshot_path}: {e}")
+    
+    @property
+    def cached_patients(self) -> Optional[Mapping[str, PatientRecord]]:
+        """Currently loaded patients keyed by ID, or None before the first load."""
+        return self._patients_cache
+    
     def get_patient_by_id(self, patient_id: str) -> PatientRecord:
         """
         Retrieve a patient record by ID.
@@ -109,21 +202,27 @@ class PatientLoader:
         if self._patients_cache is None:
             self._patients_cache = self._load_patients_data()
             
-        if patient_id not in self._patients_cache:
+        patient = self._patients_cache.get(patient_id)
+        if patient is None:
             raise PatientNotFoundError(f"Patient with ID '{patient_id}' not found")
             
-        return self._patients_cache[patient_id]
+        return patient
     
     async def get_patient_by_id_async(self, patient_id: str) -> PatientRecord:
         """
         Async version of get_patient_by_id for compatibility with async workflows.
         
+        Once the cache is loaded this is a plain lookup; a cold load runs on a
+        worker thread so file parsing and validation do not block the event loop.
+        
         Args:
             patient_id: The unique identifier for the patient
             
         Returns:
             PatientRecord object containing the patient's data
         """
+        if self._patients_cache is None:
+            await asyncio.to_thread(self.prime_cache)
         return self.get_patient_by_id(patient_id)
     
     def get_all_patients(self) -> List[PatientRecord]:
@@ -156,6 +255,20 @@ class PatientLoader:
             
         return list(self._patients_cache.keys())
     
+    def prime_cache(self) -> int:
+        """
+        Load and validate patient data now instead of on first access.
+        
+        Returns:
+            Number of patients loaded
+            
+        Raises:
+            PatientLoaderError: If there's an error loading the data
+        """
+        # Swap in the new dict in one step so concurrent readers never see a partial load
+        self._patients_cache = self._load_patients_data()
+        return len(self._patients_cache)
+    
     def reload_data(self) -> None:
         """
         Force reload of patient data from file.
@@ -165,6 +278,18 @@ class PatientLoader:
         self._patients_cache = None
         logger.info("Patient data cache cleared, will reload on next access")
     
+    async def reload_data_async(self) -> int:
+        """
+        Reload patient data from file on a worker thread.
+        
+        The current records keep serving requests until the new ones are
+        validated, and the event loop is not blocked by the file read.
+        
+        Returns:
+            Number of patients loaded
+        """
+        return await asyncio.to_thread(self.prime_cache)
+    
     def validate_patient_data(self, patient_data: dict) -> PatientRecord:
         """
         Validate patient data against the PatientRecord schema.
@@ -185,15 +310,19 @@ class PatientLoader:
     
     async def health_check(self) -> bool:
         """
-        Perform a health check by attempting to load patient data.
+        Perform a health check without re-reading the patient file.
         
         Returns:
-            True if patient data can be loaded successfully, False otherwise
+            True if patients are loaded (or, before the first load, the patient
+            file exists), False otherwise
         """
-        try:
-            patients = self._load_patients_data()
+        patients = self._patients_cache
+        if patients is not None:
             return len(patients) > 0
-        except Exception as e:
+        
+        try:
+            return self.data_file_path.is_file()
+        except OSError as e:
             logger.error(f"Patient loader health check failed: {e}")
             return False
     
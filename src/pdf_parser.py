@@ -2,19 +2,299 @@
 PDF parser for the NG12 Cancer Risk Assessor.
 Downloads and parses the NICE NG12 Cancer Guidelines PDF with metadata preservation.
 """
+import hashlib
 import logging
+import os
 import re
+import shutil
+import signal
+import subprocess
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, repeat
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import orjson
 import PyPDF2
+from pydantic import TypeAdapter, ValidationError
+
 from .models import TextChunk
 
+try:
+    # PyMuPDF extracts text in C, far faster than PyPDF2's pure-Python parser
+    import fitz
+except ImportError:
+    fitz = None
+
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever chunking output changes so cached chunks are rebuilt
+_CHUNK_CACHE_VERSION = 1
+# In-process extractor used when pdftotext is unavailable; part of the chunk cache key
+_PYTHON_EXTRACTOR = "pymupdf" if fitz is not None else "pypdf2"
+
+_CHUNKS_ADAPTER = TypeAdapter(List[TextChunk])
+
+# Page text cleanup in one scan: whitespace runs collapse to a single space
+# and "Page N of M" footers are dropped
+_CLEAN_RE = re.compile(r'\s+|Page\s+\d+\s+of\s+\d+', re.IGNORECASE)
+
+
+def _clean_replacement(match: re.Match) -> str:
+    """Replacement for a _CLEAN_RE match."""
+    return ' ' if match.group()[0].isspace() else ''
+
+# Characters searched for line-anchored headings; cleaned page text is a
+# single line, so they can only match at its start
+_TITLE_SCAN_CHARS = 512
+
+# Common section heading patterns in NG12, in priority order, with the
+# number of leading characters to search (None searches the whole page)
+_SECTION_TITLE_PATTERNS = tuple(
+    (re.compile(pattern, re.MULTILINE), scan_chars)
+    for pattern, scan_chars in (
+        (r'^(\d+\.?\d*\s+[A-Z][^.\n]{10,60})', _TITLE_SCAN_CHARS),  # Numbered sections
+        (r'^([A-Z][A-Z\s]{5,40})\n', _TITLE_SCAN_CHARS),            # All caps headers
+        (r'(Recommendation \d+\.?\d*)', None),                      # Recommendations
+        (r'(Clinical question \d+\.?\d*)', None),                   # Clinical questions
+    )
+)
+
+# Ligatures and typographic quotes left behind by PDF text extraction
+_LIGATURE_TABLE = str.maketrans({
+    'ﬁ': 'fi',
+    'ﬂ': 'fl',
+    '\u2019': "'",  # Right single quote
+    '\u201c': '"',  # Left double quote
+    '\u201d': '"',  # Right double quote
+})
+
+# Paragraphs this short are treated as extraction artifacts and dropped
+_MIN_PARAGRAPH_CHARS = 20
+
+# Paragraph breaks: blank lines or bullet points
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n|\n\s*[•·▪▫]\s*')
+
+# Browser-like User-Agent so the NICE site does not block downloads
+_DOWNLOAD_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Sample NG12-like text used when the guideline PDF cannot be downloaded
+_MOCK_NG12_CONTENT = """
+        1. Introduction
+        
+        This guideline covers identifying children, young people and adults with symptoms 
+        that could be caused by cancer. It outlines appropriate investigations in primary 
+        care, and selection of people to refer for a specialist opinion.
+        
+        1.1 Who is it for?
+        
+        This guideline is for healthcare professionals in primary care, including GPs, 
+        practice nurses, and other healthcare professionals who may encounter people 
+        with symptoms that could indicate cancer.
+        
+        2. Recommendations
+        
+        2.1 General principles for cancer referral
+        
+        Healthcare professionals should be aware that cancer can present with a wide 
+        variety of symptoms and signs. Some symptoms are more predictive of cancer 
+        than others, but even symptoms with a low predictive value can be associated 
+        with cancer.
+        
+        2.2 Lung cancer referral criteria
+        
+        Consider an urgent chest X-ray (to be performed within 2 weeks) to assess 
+        for lung cancer in people aged 40 and over if they have 2 or more of the 
+        following unexplained symptoms, or if they have ever smoked and have 1 or 
+        more of the following unexplained symptoms:
+        
+        • cough
+        • fatigue
+        • shortness of breath
+        • chest pain
+        • weight loss
+        • appetite loss
+        
+        Refer people using a suspected cancer pathway referral (for an appointment 
+        within 2 weeks) for lung cancer if they have:
+        
+        • chest X-ray findings that suggest lung cancer or
+        • aged 40 and over with unexplained haemoptysis
+        
+        2.3 Breast cancer referral criteria
+        
+        Refer people using a suspected cancer pathway referral (for an appointment 
+        within 2 weeks) for breast cancer if they are:
+        
+        • aged 30 and over and have an unexplained breast lump with or without pain or
+        • aged 50 and over with any of the following symptoms in one nipple only:
+          - nipple discharge
+          - nipple retraction
+          - other changes of concern
+        
+        2.4 Colorectal cancer referral criteria
+        
+        Refer adults using a suspected cancer pathway referral (for an appointment 
+        within 2 weeks) for colorectal cancer if:
+        
+        • they are aged 40 and over with unexplained weight loss and abdominal pain or
+        • they are aged 50 and over with unexplained rectal bleeding or
+        • they are aged 60 and over with iron-deficiency anaemia or changes in their 
+          bowel habit
+        
+        Consider a suspected cancer pathway referral (for an appointment within 2 weeks) 
+        for colorectal cancer in adults with a rectal or abdominal mass.
+        
+        2.5 Upper gastrointestinal cancer referral criteria
+        
+        Consider an urgent direct access upper gastrointestinal endoscopy (to be 
+        performed within 2 weeks) to assess for oesophageal cancer in people:
+        
+        • aged 55 and over with weight loss and any of the following:
+          - upper abdominal pain
+          - reflux
+          - dysphagia
+        
+        Refer people using a suspected cancer pathway referral (for an appointment 
+        within 2 weeks) for oesophageal cancer if they have dysphagia or
+        aged 55 and over with weight loss and upper abdominal pain or reflux.
+        
+        3. Implementation considerations
+        
+        3.1 Training and education
+        
+        Healthcare professionals should receive appropriate training on cancer 
+        recognition and referral pathways to ensure consistent implementation 
+        of these guidelines.
+        
+        3.2 Patient communication
+        
+        When referring patients for suspected cancer investigations, healthcare 
+        professionals should:
+        
+        • explain the reason for referral clearly
+        • provide appropriate information about what to expect
+        • offer support and reassurance while maintaining clinical urgency
+        
+        4. Monitoring and audit
+        
+        Healthcare organizations should monitor:
+        
+        • referral rates for suspected cancer
+        • time to diagnosis
+        • patient outcomes
+        • adherence to guideline recommendations
+        """
+
+_MOCK_ADDITIONAL_PAGES = (
+    "5. Specific cancer types\n\n5.1 Skin cancer\n\nRefer people using a suspected cancer pathway referral for skin cancer if they have a suspicious pigmented skin lesion with a weighted 7-point checklist score of 3 or above.",
+    "6. Children and young people\n\n6.1 General considerations\n\nBe aware that cancer is rare in children and young people, but healthcare professionals should still be alert to signs and symptoms that may indicate cancer.",
+    "7. Follow-up and monitoring\n\n7.1 Post-referral care\n\nAfter referring a patient for suspected cancer, primary care should maintain appropriate follow-up and support.",
+)
+
+# Bytes read from the network per write while downloading the PDF
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Seconds PyPDF2 may spend on one page; graphics-heavy pages with huge
+# content streams and little text are skipped instead
+_PAGE_EXTRACT_TIMEOUT = 10.0
+
+# Minimum pages per extraction process; smaller documents are read in-process
+_PAGES_PER_WORKER = 16
+
+# Seconds pdftotext may spend on the whole document before the Python
+# extractors take over; NG12 normally takes well under a second
+_PDFTOTEXT_TIMEOUT = 60.0
+
+
+def _count_pages(pdf_path: Path) -> int:
+    """Number of pages in the PDF."""
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+class _PageTimeoutError(Exception):
+    """Raised when extracting a single page exceeds _PAGE_EXTRACT_TIMEOUT."""
+    pass
+
+
+@contextmanager
+def _page_time_limit(seconds: float) -> Iterator[None]:
+    """
+    Abort the enclosed block with _PageTimeoutError after the given time.
+    
+    Relies on SIGALRM, so the limit only applies on POSIX in the main thread,
+    which includes extraction worker processes; elsewhere the block runs
+    without a limit.
+    
+    Args:
+        seconds: Time limit for the block
+    """
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def on_timeout(signum, frame):
+        raise _PageTimeoutError(f"text extraction took longer than {seconds:g}s")
+    
+    previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _extract_page_range(pdf_path: Path, start: int, stop: int) -> List[str]:
+    """
+    Extract the raw text of pages start..stop-1 (zero-based).
+    
+    Runs in extraction worker processes, so it opens the PDF itself. Pages
+    whose text cannot be extracted, or that PyPDF2 cannot extract within
+    _PAGE_EXTRACT_TIMEOUT, come back as empty strings.
+    
+    Args:
+        pdf_path: Path to the PDF file
+        start: Index of the first page to extract
+        stop: Index one past the last page to extract
+        
+    Returns:
+        Page texts in page order
+    """
+    page_texts = []
+    
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            for index in range(start, stop):
+                try:
+                    page_texts.append(doc[index].get_text("text"))
+                except Exception as e:
+                    logger.warning(f"Error processing page {index + 1}: {e}")
+                    page_texts.append("")
+        return page_texts
+    
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for index in range(start, stop):
+            try:
+                with _page_time_limit(_PAGE_EXTRACT_TIMEOUT):
+                    page_texts.append(pdf_reader.pages[index].extract_text())
+            except Exception as e:
+                logger.warning(f"Error processing page {index + 1}: {e}")
+                page_texts.append("")
+    return page_texts
+
 
 class PDFParserError(Exception):
     """Custom exception for PDF parser errors."""
@@ -48,6 +328,9 @@ class PDFParser:
         "https://www.nice.org.uk/guidance/ng12/chapter/recommendations"
     ]
     
+    # Chunked mock content, shared by all parser instances
+    _mock_chunks: Optional[List[TextChunk]] = None
+    
     def __init__(self, pdf_path: Optional[str] = None, download_dir: str = "data"):
         """
         Initialize the PDFParser.
@@ -65,6 +348,21 @@ class PDFParser:
             self.pdf_path = self.download_dir / "ng12_guidelines.pdf"
             
         self._text_chunks: Optional[List[TextChunk]] = None
+        self._chunks_by_id: Dict[str, TextChunk] = {}
+        self._chunks_by_page: Dict[int, List[TextChunk]] = {}
+        # Poppler's pdftotext binary is the fastest extractor when installed
+        self._pdftotext = shutil.which("pdftotext")
+        
+        # Pooled session so fallback URLs on the same host reuse the TLS connection
+        self._session = requests.Session()
+        self._session.headers.update({'User-Agent': _DOWNLOAD_USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
     
     def download_ng12_pdf(self, force_download: bool = False, use_mock_on_failure: bool = True) -> Path:
         """
@@ -91,26 +389,21 @@ class PDFParser:
             try:
                 logger.info(f"Attempting to download NG12 PDF from {url}")
                 
-                # Download with proper headers to avoid blocking
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                
-                response = requests.get(url, headers=headers, timeout=30)
-                response.raise_for_status()
-                
-                # Verify it's a PDF file
-                content_type = response.headers.get('content-type', '').lower()
-                if 'pdf' in content_type or response.content.startswith(b'%PDF'):
-                    # Save the PDF
-                    with open(self.pdf_path, 'wb') as f:
-                        f.write(response.content)
-                        
-                    logger.info(f"Successfully downloaded NG12 PDF to {self.pdf_path} ({len(response.content)} bytes)")
-                    return self.pdf_path
-                else:
-                    logger.warning(f"URL {url} did not return a PDF file")
-                    continue
+                with self._session.get(url, timeout=30, stream=True) as response:
+                    response.raise_for_status()
+                    
+                    # Verify it's a PDF file from the headers or the first bytes
+                    content = response.iter_content(_DOWNLOAD_CHUNK_SIZE)
+                    first_chunk = next(content, b'')
+                    content_type = response.headers.get('content-type', '').lower()
+                    if 'pdf' in content_type or first_chunk.startswith(b'%PDF'):
+                        # Stream the PDF to disk
+                        size = self._write_download(chain((first_chunk,), content))
+                        logger.info(f"Successfully downloaded NG12 PDF to {self.pdf_path} ({size} bytes)")
+                        return self.pdf_path
+                    else:
+                        logger.warning(f"URL {url} did not return a PDF file")
+                        continue
                     
             except requests.RequestException as e:
                 logger.warning(f"Failed to download from {url}: {e}")
@@ -130,6 +423,34 @@ class PDFParser:
         else:
             raise PDFDownloadError("Failed to download NG12 PDF from all attempted URLs")
     
+    def _write_download(self, chunks: Iterable[bytes]) -> int:
+        """
+        Write downloaded PDF bytes to pdf_path as they arrive.
+        
+        The bytes go to a temporary file that replaces pdf_path only once the
+        download completes, so an interrupted download never leaves a
+        truncated PDF behind.
+        
+        Args:
+            chunks: Response body chunks
+            
+        Returns:
+            Number of bytes written
+        """
+        part_path = self.pdf_path.with_suffix('.part')
+        size = 0
+        try:
+            with open(part_path, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+            part_path.replace(self.pdf_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        return size
+    
     def extract_text_with_metadata(self) -> List[TextChunk]:
         """
         Extract text from PDF with page metadata and semantic chunking.
@@ -153,37 +474,130 @@ class PDFParser:
             raise PDFParsingError(f"PDF file not found: {self.pdf_path}")
             
         try:
+            pdf_hash = hashlib.blake2b(self.pdf_path.read_bytes(), digest_size=16).hexdigest()
+            # Chunks are saved under the extractor that actually ran, which is
+            # the Python one when pdftotext fails, so every candidate is checked
+            for extractor in self._extractor_order():
+                cached_chunks = self._load_cached_chunks(self._chunks_cache_path(pdf_hash, extractor))
+                if cached_chunks is not None:
+                    self._set_chunks(cached_chunks)
+                    return cached_chunks
+            
             logger.info(f"Extracting text from PDF: {self.pdf_path}")
             
             chunks = []
+            extractor, page_texts = self._extract_page_texts()
+            total_pages = len(page_texts)
             
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
-                
-                logger.info(f"Processing {total_pages} pages")
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    try:
-                        # Extract text from page
-                        text = page.extract_text()
+            logger.info(f"Processing {total_pages} pages")
+            
+            for page_num, text in enumerate(page_texts, 1):
+                try:
+                    if text.strip():  # Only process pages with text
+                        # Create chunks for this page
+                        page_chunks = self._chunk_text(text, page_num)
+                        chunks.extend(page_chunks)
                         
-                        if text.strip():  # Only process pages with text
-                            # Create chunks for this page
-                            page_chunks = self._chunk_text(text, page_num)
-                            chunks.extend(page_chunks)
-                            
-                    except Exception as e:
-                        logger.warning(f"Error processing page {page_num}: {e}")
-                        continue
+                except Exception as e:
+                    logger.warning(f"Error processing page {page_num}: {e}")
+                    continue
             
             logger.info(f"Successfully extracted {len(chunks)} text chunks from {total_pages} pages")
-            self._text_chunks = chunks
+            self._save_cached_chunks(self._chunks_cache_path(pdf_hash, extractor), chunks)
+            self._set_chunks(chunks)
             return chunks
             
         except Exception as e:
             raise PDFParsingError(f"Failed to parse PDF: {e}")
     
+    def _chunks_cache_path(self, pdf_hash: str, extractor: str) -> Path:
+        """
+        Path of the chunk cache for a PDF's contents and text extractor.
+        
+        The extractors lay out text differently, so their chunks are cached apart.
+        """
+        return self.download_dir / f"chunks_v{_CHUNK_CACHE_VERSION}_{extractor}_{pdf_hash[:16]}.json"
+    
+    def _extractor_order(self) -> Tuple[str, ...]:
+        """Names of the extractors _extract_page_texts may use, in the order it tries them."""
+        return ("pdftotext", _PYTHON_EXTRACTOR) if self._pdftotext else (_PYTHON_EXTRACTOR,)
+    
+    def _load_cached_chunks(self, cache_path: Path) -> Optional[List[TextChunk]]:
+        """
+        Load chunks extracted earlier from the same PDF contents.
+        
+        Args:
+            cache_path: Cache file for the PDF's content hash
+            
+        Returns:
+            Cached chunks, or None if there is no usable cache file
+        """
+        try:
+            chunks = _CHUNKS_ADAPTER.validate_json(cache_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValidationError) as e:
+            logger.warning(f"Ignoring unreadable chunk cache {cache_path}: {e}")
+            return None
+        
+        logger.info(f"Loaded {len(chunks)} cached text chunks from {cache_path}")
+        return chunks
+    
+    def _save_cached_chunks(self, cache_path: Path, chunks: List[TextChunk]) -> None:
+        """
+        Persist extracted chunks so unchanged PDFs are not parsed again.
+        
+        Args:
+            cache_path: Cache file for the PDF's content hash
+            chunks: Chunks extracted from the PDF
+        """
+        try:
+            cache_path.write_bytes(_CHUNKS_ADAPTER.dump_json(chunks))
+        except OSError as e:
+            logger.warning(f"Could not write chunk cache {cache_path}: {e}")
+    
+    def _extract_page_texts(self) -> Tuple[str, List[str]]:
+        """
+        Extract the raw text of every page.
+        
+        Uses Poppler's pdftotext when it is on PATH, then PyMuPDF when
+        installed, then PyPDF2. The Python extractors split longer documents
+        into page ranges read by separate processes. Pages whose text cannot
+        be extracted come back as empty strings.
+        
+        Returns:
+            Name of the extractor that was used, and the page texts in page order
+        """
+        if self._pdftotext:
+            try:
+                result = subprocess.run(
+                    [self._pdftotext, "-layout", "-enc", "UTF-8", str(self.pdf_path), "-"],
+                    capture_output=True,
+                    check=True,
+                    timeout=_PDFTOTEXT_TIMEOUT
+                )
+                # Pages are separated by form feeds, with one after the last page
+                page_texts = result.stdout.decode("utf-8", errors="replace").split("\f")
+                if page_texts and not page_texts[-1]:
+                    page_texts.pop()
+                return "pdftotext", page_texts
+            except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                # run() kills a timed-out pdftotext before raising TimeoutExpired
+                logger.warning(f"pdftotext failed, falling back to Python extraction: {e}")
+        
+        extractor = _PYTHON_EXTRACTOR
+        total_pages = _count_pages(self.pdf_path)
+        workers = min(os.cpu_count() or 1, total_pages // _PAGES_PER_WORKER)
+        if workers <= 1:
+            return extractor, _extract_page_range(self.pdf_path, 0, total_pages)
+        
+        # Contiguous ranges so each worker opens and parses the PDF only once
+        starts = [total_pages * i // workers for i in range(workers)]
+        stops = starts[1:] + [total_pages]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranges = executor.map(_extract_page_range, repeat(self.pdf_path), starts, stops)
+            return extractor, [text for page_range in ranges for text in page_range]
+    
     def _chunk_text(self, text: str, page_num: int) -> List[TextChunk]:
         """
         Create semantic chunks from page text preserving section structure.
@@ -200,7 +614,8 @@ class PDFParser:
         # Clean and normalize text
         text = self._clean_text(text)
         
-        if not text.strip():
+        # Nothing on the page can become a paragraph (e.g. image-only pages)
+        if len(text) <= _MIN_PARAGRAPH_CHARS:
             return chunks
             
         # Extract section headers for context
@@ -214,13 +629,16 @@ class PDFParser:
         # Split by paragraphs first to maintain semantic boundaries
         paragraphs = self._split_into_paragraphs(text)
         
-        current_chunk = ""
+        # Paragraphs of the chunk being built, joined only when it is emitted
+        current_pieces: List[str] = []
+        current_len = 0
         chunk_start = 0
         chunk_count = 0
         
         for paragraph in paragraphs:
             # If adding this paragraph would exceed target size, create a chunk
-            if len(current_chunk) + len(paragraph) > target_chunk_size and current_chunk:
+            if current_len + len(paragraph) > target_chunk_size and current_pieces:
+                current_chunk = "\n".join(current_pieces)
                 chunk_count += 1
                 chunk_id = f"ng12_{page_num:04d}_{chunk_count:02d}"
                 
@@ -235,16 +653,18 @@ class PDFParser:
                 chunks.append(chunk)
                 
                 # Start new chunk with overlap
-                overlap_text = current_chunk[-overlap_size:] if len(current_chunk) > overlap_size else current_chunk
-                current_chunk = overlap_text + "\n" + paragraph
-                chunk_start += len(current_chunk) - len(overlap_text) - len(paragraph) - 1
+                overlap_text = current_chunk[-overlap_size:] if current_len > overlap_size else current_chunk
+                current_pieces = [overlap_text, paragraph]
+                current_len = len(overlap_text) + 1 + len(paragraph)
+                chunk_start += current_len - len(overlap_text) - len(paragraph) - 1
             else:
-                if current_chunk:
-                    current_chunk += "\n" + paragraph
-                else:
-                    current_chunk = paragraph
+                if current_pieces:
+                    current_len += 1
+                current_pieces.append(paragraph)
+                current_len += len(paragraph)
         
         # Add final chunk if there's remaining content
+        current_chunk = "\n".join(current_pieces)
         if current_chunk.strip():
             chunk_count += 1
             chunk_id = f"ng12_{page_num:04d}_{chunk_count:02d}"
@@ -271,21 +691,11 @@ class PDFParser:
         Returns:
             Cleaned text
         """
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove page headers/footers (common patterns)
-        text = re.sub(r'NICE guideline.*?\n', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Page \d+ of \d+', '', text, flags=re.IGNORECASE)
-        
-        # Fix common PDF extraction issues
-        text = text.replace('ﬁ', 'fi')  # Fix ligatures
-        text = text.replace('ﬂ', 'fl')
-        text = text.replace('\u2019', "'")    # Fix right single quote
-        text = text.replace('\u201c', '"')    # Fix left double quote
-        text = text.replace('\u201d', '"')    # Fix right double quote
+        # Fix common PDF extraction issues (ligatures, typographic quotes)
+        text = text.translate(_LIGATURE_TABLE)
         
-        return text.strip()
+        # Collapse whitespace and remove page footers
+        return _CLEAN_RE.sub(_clean_replacement, text).strip()
     
     def _extract_section_title(self, text: str) -> str:
         """
@@ -298,20 +708,13 @@ class PDFParser:
             Section title or default
         """
         # Look for common section patterns in NG12
-        patterns = [
-            r'^(\d+\.?\d*\s+[A-Z][^.\n]{10,60})',  # Numbered sections
-            r'^([A-Z][A-Z\s]{5,40})\n',            # All caps headers
-            r'(Recommendation \d+\.?\d*)',          # Recommendations
-            r'(Clinical question \d+\.?\d*)',       # Clinical questions
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE)
+        for pattern, scan_chars in _SECTION_TITLE_PATTERNS:
+            match = pattern.search(text, 0, scan_chars or len(text))
             if match:
                 return match.group(1).strip()
         
         # Fallback: use first line if it looks like a title
-        first_line = text.split('\n')[0].strip()
+        first_line = text.partition('\n')[0].strip()
         if len(first_line) < 100 and first_line:
             return first_line
             
@@ -328,10 +731,10 @@ class PDFParser:
             List of paragraph strings
         """
         # Split by double newlines or bullet points
-        paragraphs = re.split(r'\n\s*\n|\n\s*[•·▪▫]\s*', text)
+        paragraphs = _PARAGRAPH_SPLIT_RE.split(text)
         
         # Filter out very short paragraphs (likely artifacts)
-        paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > 20]
+        paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > _MIN_PARAGRAPH_CHARS]
         
         return paragraphs
     
@@ -342,130 +745,30 @@ class PDFParser:
         Returns:
             List of TextChunk objects with sample NG12-like content
         """
-        mock_content = """
-        1. Introduction
-        
-        This guideline covers identifying children, young people and adults with symptoms 
-        that could be caused by cancer. It outlines appropriate investigations in primary 
-        care, and selection of people to refer for a specialist opinion.
-        
-        1.1 Who is it for?
-        
-        This guideline is for healthcare professionals in primary care, including GPs, 
-        practice nurses, and other healthcare professionals who may encounter people 
-        with symptoms that could indicate cancer.
-        
-        2. Recommendations
-        
-        2.1 General principles for cancer referral
-        
-        Healthcare professionals should be aware that cancer can present with a wide 
-        variety of symptoms and signs. Some symptoms are more predictive of cancer 
-        than others, but even symptoms with a low predictive value can be associated 
-        with cancer.
-        
-        2.2 Lung cancer referral criteria
-        
-        Consider an urgent chest X-ray (to be performed within 2 weeks) to assess 
-        for lung cancer in people aged 40 and over if they have 2 or more of the 
-        following unexplained symptoms, or if they have ever smoked and have 1 or 
-        more of the following unexplained symptoms:
-        
-        • cough
-        • fatigue
-        • shortness of breath
-        • chest pain
-        • weight loss
-        • appetite loss
-        
-        Refer people using a suspected cancer pathway referral (for an appointment 
-        within 2 weeks) for lung cancer if they have:
-        
-        • chest X-ray findings that suggest lung cancer or
-        • aged 40 and over with unexplained haemoptysis
-        
-        2.3 Breast cancer referral criteria
-        
-        Refer people using a suspected cancer pathway referral (for an appointment 
-        within 2 weeks) for breast cancer if they are:
-        
-        • aged 30 and over and have an unexplained breast lump with or without pain or
-        • aged 50 and over with any of the following symptoms in one nipple only:
-          - nipple discharge
-          - nipple retraction
-          - other changes of concern
-        
-        2.4 Colorectal cancer referral criteria
-        
-        Refer adults using a suspected cancer pathway referral (for an appointment 
-        within 2 weeks) for colorectal cancer if:
-        
-        • they are aged 40 and over with unexplained weight loss and abdominal pain or
-        • they are aged 50 and over with unexplained rectal bleeding or
-        • they are aged 60 and over with iron-deficiency anaemia or changes in their 
-          bowel habit
-        
-        Consider a suspected cancer pathway referral (for an appointment within 2 weeks) 
-        for colorectal cancer in adults with a rectal or abdominal mass.
-        
-        2.5 Upper gastrointestinal cancer referral criteria
-        
-        Consider an urgent direct access upper gastrointestinal endoscopy (to be 
-        performed within 2 weeks) to assess for oesophageal cancer in people:
-        
-        • aged 55 and over with weight loss and any of the following:
-          - upper abdominal pain
-          - reflux
-          - dysphagia
-        
-        Refer people using a suspected cancer pathway referral (for an appointment 
-        within 2 weeks) for oesophageal cancer if they have dysphagia or
-        aged 55 and over with weight loss and upper abdominal pain or reflux.
-        
-        3. Implementation considerations
-        
-        3.1 Training and education
-        
-        Healthcare professionals should receive appropriate training on cancer 
-        recognition and referral pathways to ensure consistent implementation 
-        of these guidelines.
-        
-        3.2 Patient communication
-        
-        When referring patients for suspected cancer investigations, healthcare 
-        professionals should:
-        
-        • explain the reason for referral clearly
-        • provide appropriate information about what to expect
-        • offer support and reassurance while maintaining clinical urgency
-        
-        4. Monitoring and audit
-        
-        Healthcare organizations should monitor:
-        
-        • referral rates for suspected cancer
-        • time to diagnosis
-        • patient outcomes
-        • adherence to guideline recommendations
-        """
-        
-        # Create chunks from mock content
-        chunks = self._chunk_text(mock_content, 1)
-        
-        # Add some additional pages of content
-        additional_pages = [
-            "5. Specific cancer types\n\n5.1 Skin cancer\n\nRefer people using a suspected cancer pathway referral for skin cancer if they have a suspicious pigmented skin lesion with a weighted 7-point checklist score of 3 or above.",
-            "6. Children and young people\n\n6.1 General considerations\n\nBe aware that cancer is rare in children and young people, but healthcare professionals should still be alert to signs and symptoms that may indicate cancer.",
-            "7. Follow-up and monitoring\n\n7.1 Post-referral care\n\nAfter referring a patient for suspected cancer, primary care should maintain appropriate follow-up and support."
-        ]
-        
-        for page_num, content in enumerate(additional_pages, 2):
-            page_chunks = self._chunk_text(content, page_num)
-            chunks.extend(page_chunks)
+        # The mock content never changes, so it is chunked once per process
+        if PDFParser._mock_chunks is None:
+            # Create chunks from mock content, plus some additional pages
+            chunks = self._chunk_text(_MOCK_NG12_CONTENT, 1)
+            for page_num, content in enumerate(_MOCK_ADDITIONAL_PAGES, 2):
+                chunks.extend(self._chunk_text(content, page_num))
+            PDFParser._mock_chunks = chunks
+            logger.info(f"Created {len(chunks)} mock NG12 content chunks")
+        
+        chunks = list(PDFParser._mock_chunks)
+        self._set_chunks(chunks)
+        return chunks
+    
+    def _set_chunks(self, chunks: List[TextChunk]) -> None:
+        """Store extracted chunks and index them by ID and page."""
+        chunks_by_id: Dict[str, TextChunk] = {}
+        chunks_by_page: Dict[int, List[TextChunk]] = {}
+        for chunk in chunks:
+            chunks_by_id.setdefault(chunk.chunk_id, chunk)
+            chunks_by_page.setdefault(chunk.page_number, []).append(chunk)
         
-        logger.info(f"Created {len(chunks)} mock NG12 content chunks")
         self._text_chunks = chunks
-        return chunks
+        self._chunks_by_id = chunks_by_id
+        self._chunks_by_page = chunks_by_page
     
     def get_chunk_by_id(self, chunk_id: str) -> Optional[TextChunk]:
         """
@@ -480,11 +783,7 @@ class PDFParser:
         if self._text_chunks is None:
             self.extract_text_with_metadata()
             
-        for chunk in self._text_chunks:
-            if chunk.chunk_id == chunk_id:
-                return chunk
-                
-        return None
+        return self._chunks_by_id.get(chunk_id)
     
     def get_chunks_by_page(self, page_number: int) -> List[TextChunk]:
         """
@@ -499,21 +798,27 @@ class PDFParser:
         if self._text_chunks is None:
             self.extract_text_with_metadata()
             
-        return [chunk for chunk in self._text_chunks if chunk.page_number == page_number]
+        return list(self._chunks_by_page.get(page_number, ()))
     
-    def save_chunks_to_file(self, output_path: str) -> None:
+    def save_chunks_to_file(self, output_path: str, jsonl: bool = False) -> None:
         """
         Save extracted chunks to a JSON file for debugging.
         
+        Chunks are written as an indented JSON array. With ``jsonl`` set, or
+        an output path ending in ``.jsonl``, each chunk is instead written as
+        one JSON object per line as it is encoded, without building the whole
+        document in memory.
+        
         Args:
             output_path: Path to save the chunks
+            jsonl: Write one JSON object per line instead of a JSON array
         """
         import json
         
         if self._text_chunks is None:
             self.extract_text_with_metadata()
             
-        chunks_data = [
+        chunks_data = (
             {
                 "chunk_id": chunk.chunk_id,
                 "content": chunk.content,
@@ -523,9 +828,14 @@ class PDFParser:
                 "end_char": chunk.end_char
             }
             for chunk in self._text_chunks
-        ]
+        )
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(chunks_data, f, indent=2, ensure_ascii=False)
+        if jsonl or str(output_path).endswith(".jsonl"):
+            with open(output_path, 'wb') as f:
+                for chunk_data in chunks_data:
+                    f.write(orjson.dumps(chunk_data, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(list(chunks_data), f, indent=2, ensure_ascii=False)
             
-        logger.info(f"Saved {len(chunks_data)} chunks to {output_path}")
\ No newline at end of file
+        logger.info(f"Saved {len(self._text_chunks)} chunks to {output_path}")
\ No newline at end of file
@@ -3,13 +3,16 @@ RAG (Retrieval-Augmented Generation) pipeline for the NG12 Cancer Risk Assessor.
 Orchestrates the retrieval of relevant NG12 guideline content and citation formatting.
 """
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from typing import AsyncIterator, List, Optional, Dict, Any, Union
 import asyncio
 
+import numpy as np
+
 from .models import RetrievedChunk, DocumentMetadata, Citation, TextChunk, GeneratedResponse
 from .embedding_service import EmbeddingService, EmbeddingServiceError
 from .vector_store import VectorStore, VectorStoreError, SearchResult
-from .gemini_agent import GeminiAgent
+from .gemini_agent import GeminiAgent, GeminiAgentError
 
 
 logger = logging.getLogger(__name__)
@@ -58,7 +61,8 @@ class RAGPipeline:
         self,
         query: str,
         top_k: Optional[int] = None,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[RetrievedChunk]:
         """
         Retrieve relevant chunks for a given query.
@@ -67,6 +71,8 @@ class RAGPipeline:
             query: Search query text
             top_k: Number of chunks to retrieve (defaults to pipeline default)
             filter_metadata: Optional metadata filters for search
+            query_embedding: Precomputed RETRIEVAL_QUERY embedding of the query,
+                if the caller already has one
             
         Returns:
             List of RetrievedChunk objects ranked by relevance
@@ -80,9 +86,10 @@ class RAGPipeline:
         k = top_k or self.default_top_k
         
         try:
-            # Generate query embedding
-            logger.debug(f"Generating embedding for query: {query[:100]}...")
-            query_embedding = await self.embedding_service.generate_query_embedding(query.strip())
+            # Generate query embedding unless the caller supplied one
+            if query_embedding is None:
+                logger.debug(f"Generating embedding for query: {query[:100]}...")
+                query_embedding = await self.embedding_service.generate_query_embedding(query.strip())
             
             # Perform similarity search
             logger.debug(f"Searching for {k} most relevant chunks")
@@ -174,7 +181,8 @@ class RAGPipeline:
         query: str,
         top_k: Optional[int] = None,
         format_for_llm: bool = True,
-        include_citations: bool = True
+        include_citations: bool = True,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Perform search and return formatted results.
@@ -184,13 +192,14 @@ class RAGPipeline:
             top_k: Number of results to retrieve
             format_for_llm: Whether to format context for LLM
             include_citations: Whether to include citation objects
+            query_embedding: Precomputed RETRIEVAL_QUERY embedding of the query
             
         Returns:
             Dictionary with formatted results
         """
         try:
             # Retrieve relevant chunks
-            chunks = await self.retrieve_relevant_chunks(query, top_k)
+            chunks = await self.retrieve_relevant_chunks(query, top_k, query_embedding=query_embedding)
             
             result = {
                 "query": query,
@@ -211,11 +220,49 @@ class RAGPipeline:
         except Exception as e:
             raise RAGPipelineError(f"Failed to search and format results: {e}")
     
+    @staticmethod
+    def build_clinical_query(
+        patient_symptoms: List[str],
+        patient_demographics: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Build the guideline search query for a patient.
+        
+        Args:
+            patient_symptoms: List of patient symptoms
+            patient_demographics: Optional patient demographic info
+            
+        Returns:
+            Clinical query text used for guideline retrieval
+        """
+        symptoms_text = ", ".join(patient_symptoms)
+        
+        # Add demographic context if available
+        demographic_context = ""
+        if patient_demographics:
+            age = patient_demographics.get("age")
+            gender = patient_demographics.get("gender")
+            smoking = patient_demographics.get("smoking_history")
+            
+            demo_parts = []
+            if age:
+                demo_parts.append(f"age {age}")
+            if gender:
+                demo_parts.append(gender.lower())
+            if smoking:
+                demo_parts.append(f"smoking history: {smoking}")
+            
+            if demo_parts:
+                demographic_context = f" in {', '.join(demo_parts)} patient"
+        
+        return f"cancer referral criteria for {symptoms_text}{demographic_context}"
+    
     async def build_clinical_context(
         self,
         patient_symptoms: List[str],
         patient_demographics: Optional[Dict[str, Any]] = None,
-        top_k: int = 8
+        top_k: int = 8,
+        query_embedding: Optional[np.ndarray] = None
     ) -> Dict[str, Any]:
         """
         Build clinical context for patient assessment.
@@ -224,6 +271,8 @@ class RAGPipeline:
             patient_symptoms: List of patient symptoms
             patient_demographics: Optional patient demographic info
             top_k: Number of guideline chunks to retrieve
+            query_embedding: Precomputed embedding of the clinical query, e.g.
+                from one batched embedding call for several patients
             
         Returns:
             Dictionary with clinical context and citations
@@ -232,28 +281,7 @@ class RAGPipeline:
             raise RAGPipelineError("Patient symptoms cannot be empty")
         
         try:
-            # Construct clinical query
-            symptoms_text = ", ".join(patient_symptoms)
-            
-            # Add demographic context if available
-            demographic_context = ""
-            if patient_demographics:
-                age = patient_demographics.get("age")
-                gender = patient_demographics.get("gender")
-                smoking = patient_demographics.get("smoking_history")
-                
-                demo_parts = []
-                if age:
-                    demo_parts.append(f"age {age}")
-                if gender:
-                    demo_parts.append(gender.lower())
-                if smoking:
-                    demo_parts.append(f"smoking history: {smoking}")
-                
-                if demo_parts:
-                    demographic_context = f" in {', '.join(demo_parts)} patient"
-            
-            clinical_query = f"cancer referral criteria for {symptoms_text}{demographic_context}"
+            clinical_query = self.build_clinical_query(patient_symptoms, patient_demographics)
             
             logger.info(f"Building clinical context for: {clinical_query}")
             
@@ -262,7 +290,8 @@ class RAGPipeline:
                 query=clinical_query,
                 top_k=top_k,
                 format_for_llm=True,
-                include_citations=True
+                include_citations=True,
+                query_embedding=query_embedding
             )
             
             # Add clinical-specific formatting
@@ -328,6 +357,47 @@ class RAGPipeline:
         except Exception as e:
             raise RAGPipelineError(f"Unexpected error during initialization: {e}")
     
+    async def warmup(self) -> Dict[str, float]:
+        """
+        Exercise each backend once so the first real request skips cold starts.
+        
+        Runs one query embedding, one single-result vector search and one
+        Gemini ping, which opens the Vertex AI channels and loads the vector
+        index. Failures are logged and never raised, so warmup cannot block
+        startup.
+        
+        Returns:
+            Seconds spent in each stage, keyed by stage name
+        """
+        timings: Dict[str, float] = {}
+        query_embedding = None
+        
+        start = time.perf_counter()
+        try:
+            query_embedding = await self.embedding_service.generate_query_embedding("warmup")
+        except Exception as e:
+            logger.warning(f"Embedding warmup failed: {e}")
+        timings["embedding"] = time.perf_counter() - start
+        
+        if query_embedding is not None:
+            start = time.perf_counter()
+            try:
+                await self.vector_store.similarity_search(query_embedding=query_embedding, top_k=1)
+            except Exception as e:
+                logger.warning(f"Vector search warmup failed: {e}")
+            timings["vector_search"] = time.perf_counter() - start
+        
+        if self.gemini_agent is not None:
+            start = time.perf_counter()
+            await self.gemini_agent.health_check()
+            timings["generation"] = time.perf_counter() - start
+        
+        logger.info(
+            "Warmed up RAG pipeline: "
+            + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+        )
+        return timings
+    
     async def health_check(self) -> Dict[str, Any]:
         """
         Perform comprehensive health check of the RAG pipeline.
@@ -399,7 +469,9 @@ class RAGPipeline:
         self,
         query: str,
         conversation_history: Optional[str] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        query_embedding: Optional[np.ndarray] = None,
+        chunks: Optional[List[RetrievedChunk]] = None
     ) -> GeneratedResponse:
         """
         Generate a chat response using retrieved NG12 content and Gemini.
@@ -408,6 +480,10 @@ class RAGPipeline:
             query: User's chat query
             conversation_history: Previous conversation context
             top_k: Number of relevant chunks to retrieve
+            query_embedding: Precomputed query embedding, to avoid embedding
+                the query a second time
+            chunks: Chunks the caller already retrieved for this query and
+                top_k, to avoid searching again
             
         Returns:
             GeneratedResponse with content and citations
@@ -417,42 +493,129 @@ class RAGPipeline:
         """
         try:
             # Retrieve relevant chunks
-            chunks = await self.retrieve_relevant_chunks(query, top_k)
+            if chunks is None:
+                chunks = await self.retrieve_relevant_chunks(
+                    query, top_k, query_embedding=query_embedding
+                )
             
             # Format context for LLM
             guideline_context = self.format_context_for_llm(chunks)
             
             # Generate response using Gemini (if available)
+            fallback = False
             if self.gemini_agent:
-                response_content = await self.gemini_agent.generate_chat_response(
+                response_content, fallback = await self.gemini_agent.generate_chat_response_with_fallback(
                     user_query=query,
                     guideline_context=guideline_context,
                     conversation_history=conversation_history
                 )
             else:
-                # Fallback response if no Gemini agent
-                if chunks:
-                    response_content = f"Based on the NG12 guidelines, here is the relevant information:\n\n{guideline_context}"
-                else:
-                    response_content = "I cannot find support in NG12 for that query. No relevant guidelines were found."
+                response_content = self._agentless_chat_response(chunks, guideline_context)
             
-            # Format citations
-            citations = self.format_citations(chunks)
+            return self._chat_generated_response(query, response_content, chunks, fallback)
             
-            return GeneratedResponse(
-                content=response_content,
-                citations=citations,
-                model_metadata={
-                    "query": query,
-                    "num_chunks_retrieved": len(chunks),
-                    "has_gemini_agent": self.gemini_agent is not None
-                }
-            )
+        except RAGPipelineError:
+            raise
+        except Exception as e:
+            raise RAGPipelineError(f"Failed to generate chat response: {e}")
+    
+    async def stream_chat_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        top_k: int = 5,
+        query_embedding: Optional[np.ndarray] = None,
+        chunks: Optional[List[RetrievedChunk]] = None
+    ) -> AsyncIterator[Union[str, GeneratedResponse]]:
+        """
+        Stream a chat response using retrieved NG12 content and Gemini.
+        
+        If the Gemini stream fails before any text arrives, the answer is
+        generated through generate_chat_response_with_fallback instead, so the
+        caller still gets an answer (marked as a fallback if that fails too).
+        
+        Args:
+            query: User's chat query
+            conversation_history: Previous conversation context
+            top_k: Number of relevant chunks to retrieve
+            query_embedding: Precomputed query embedding, to avoid embedding
+                the query a second time
+            chunks: Chunks the caller already retrieved for this query and
+                top_k, to avoid searching again
+            
+        Yields:
+            Response text fragments, then the complete GeneratedResponse
             
+        Raises:
+            RAGPipelineError: If retrieval fails, or generation fails after
+                text has been yielded
+        """
+        try:
+            if chunks is None:
+                chunks = await self.retrieve_relevant_chunks(
+                    query, top_k, query_embedding=query_embedding
+                )
+            guideline_context = self.format_context_for_llm(chunks)
         except RAGPipelineError:
             raise
         except Exception as e:
             raise RAGPipelineError(f"Failed to generate chat response: {e}")
+        
+        fragments = []
+        fallback = False
+        if self.gemini_agent:
+            try:
+                async for text in self.gemini_agent.generate_chat_response_stream(
+                    user_query=query,
+                    guideline_context=guideline_context,
+                    conversation_history=conversation_history
+                ):
+                    fragments.append(text)
+                    yield text
+            except GeminiAgentError as e:
+                if fragments:
+                    raise RAGPipelineError(f"Chat response stream failed: {e}")
+                logger.warning(f"Chat response stream failed, generating without streaming: {e}")
+                response_content, fallback = await self.gemini_agent.generate_chat_response_with_fallback(
+                    user_query=query,
+                    guideline_context=guideline_context,
+                    conversation_history=conversation_history
+                )
+                fragments.append(response_content)
+                yield response_content
+        else:
+            response_content = self._agentless_chat_response(chunks, guideline_context)
+            fragments.append(response_content)
+            yield response_content
+        
+        yield self._chat_generated_response(query, "".join(fragments).strip(), chunks, fallback)
+    
+    @staticmethod
+    def _agentless_chat_response(chunks: List[RetrievedChunk], guideline_context: str) -> str:
+        """Answer with the retrieved guideline text when no Gemini agent is configured."""
+        if chunks:
+            return f"Based on the NG12 guidelines, here is the relevant information:\n\n{guideline_context}"
+        return "I cannot find support in NG12 for that query. No relevant guidelines were found."
+    
+    def _chat_generated_response(
+        self,
+        query: str,
+        response_content: str,
+        chunks: List[RetrievedChunk],
+        fallback: bool
+    ) -> GeneratedResponse:
+        """Wrap a chat answer with its citations and generation metadata."""
+        return GeneratedResponse(
+            content=response_content,
+            citations=self.format_citations(chunks),
+            model_metadata={
+                "query": query,
+                "num_chunks_retrieved": len(chunks),
+                "has_gemini_agent": self.gemini_agent is not None,
+                # Mock text stood in for a failed Gemini call
+                "fallback": fallback
+            }
+        )
     
     async def generate_assessment_response(
         self,
@@ -6,9 +6,10 @@ import logging
 import os
 import json
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import uuid
 
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
@@ -60,7 +61,8 @@ class VectorStore:
     def __init__(
         self,
         store_path: str = "./data/vector_store",
-        collection_name: str = "ng12_guidelines"
+        collection_name: str = "ng12_guidelines",
+        exact_search_max_documents: int = 10_000
     ):
         """
         Initialize the VectorStore.
@@ -68,9 +70,13 @@ class VectorStore:
         Args:
             store_path: Path to store the ChromaDB database
             collection_name: Name of the collection to store documents
+            exact_search_max_documents: Largest collection size for which batch
+                search scans every document exactly; larger collections are
+                searched through ChromaDB's approximate HNSW index
         """
         self.store_path = Path(store_path)
         self.collection_name = collection_name
+        self.exact_search_max_documents = exact_search_max_documents
         
         # Create directory if it doesn't exist
         self.store_path.mkdir(parents=True, exist_ok=True)
@@ -79,6 +85,15 @@ class VectorStore:
         self._client: Optional[chromadb.Client] = None
         self._collection: Optional[chromadb.Collection] = None
         
+        # In-memory copy of the collection for vectorized batch search,
+        # loaded on first use and invalidated whenever the collection changes
+        self._doc_matrix: Optional[np.ndarray] = None
+        self._doc_ids: List[str] = []
+        self._doc_contents: List[str] = []
+        self._doc_metadatas: List[Dict[str, Any]] = []
+        # Bumped whenever the collection changes, so callers can detect stale derived data
+        self.version = 0
+        
         self._initialize_client()
     
     def _initialize_client(self) -> None:
@@ -94,18 +109,29 @@ class VectorStore:
             )
             
             # Get or create collection
-            # Note: We'll use external embeddings, so no embedding function needed
+            # Note: We'll use external embeddings, so no embedding function needed.
+            # Embeddings are unit-length, so an inner-product index ranks by cosine
+            # similarity without computing per-document norms.
             self._collection = self._client.get_or_create_collection(
                 name=self.collection_name,
-                metadata={"description": "NG12 Cancer Guidelines chunks with embeddings"}
+                metadata={
+                    "description": "NG12 Cancer Guidelines chunks with embeddings",
+                    "hnsw:space": "ip"
+                }
             )
             
+            # Collections created before the switch to inner product keep their space
+            collection_metadata = self._collection.metadata or {}
+            self._distance_space = collection_metadata.get("hnsw:space", "l2")
+            self._doc_matrix = None
+            self.version += 1
+            
             logger.info(f"Initialized ChromaDB collection '{self.collection_name}' at {self.store_path}")
             
         except Exception as e:
             raise VectorStoreError(f"Failed to initialize ChromaDB: {e}")
     
-    async def add_documents(self, chunks: List[TextChunk], embeddings: List[List[float]]) -> None:
+    async def add_documents(self, chunks: List[TextChunk], embeddings: Sequence[Sequence[float]]) -> None:
         """
         Add document chunks with their embeddings to the vector store.
         
@@ -155,6 +181,8 @@ class VectorStore:
                 metadatas=metadatas,
                 embeddings=embeddings_list
             )
+            self._doc_matrix = None
+            self.version += 1
             
             logger.info(f"Added {len(chunks)} documents to vector store")
             
@@ -163,7 +191,7 @@ class VectorStore:
     
     async def similarity_search(
         self,
-        query_embedding: List[float],
+        query_embedding: Sequence[float],
         top_k: int = 5,
         filter_metadata: Optional[Dict[str, Any]] = None
     ) -> List[SearchResult]:
@@ -181,7 +209,7 @@ class VectorStore:
         Raises:
             VectorStoreError: If search fails
         """
-        if not query_embedding:
+        if len(query_embedding) == 0:
             raise VectorStoreError("Query embedding cannot be empty")
         
         try:
@@ -203,32 +231,10 @@ class VectorStore:
                 distances = results["distances"][0]
                 
                 for i in range(len(ids)):
-                    # Convert distance to similarity score (ChromaDB uses L2 distance)
-                    # For L2 distance, similarity = 1 / (1 + distance)
-                    # But we need to handle very small distances better
-                    distance = distances[i]
-                    if distance < 0.001:
-                        similarity_score = 1.0 - distance  # For very small distances
-                    else:
-                        similarity_score = 1.0 / (1.0 + distance)
-                    
-                    # Create DocumentMetadata object
-                    metadata = DocumentMetadata(
-                        chunk_id=metadatas[i]["chunk_id"],
-                        page_number=metadatas[i]["page_number"],
-                        section_title=metadatas[i]["section_title"],
-                        excerpt=documents[i][:200] + "..." if len(documents[i]) > 200 else documents[i],
-                        document_source=metadatas[i].get("document_source", "NG12 PDF")
-                    )
-                    
-                    search_result = SearchResult(
-                        chunk_id=ids[i],
-                        content=documents[i],
-                        metadata=metadata,
-                        similarity_score=similarity_score
+                    similarity_score = self._distance_to_similarity(distances[i])
+                    search_results.append(
+                        self._build_search_result(ids[i], documents[i], metadatas[i], similarity_score)
                     )
-                    
-                    search_results.append(search_result)
             
             logger.debug(f"Found {len(search_results)} results for similarity search")
             return search_results
@@ -236,6 +242,186 @@ class VectorStore:
         except Exception as e:
             raise VectorStoreError(f"Similarity search failed: {e}")
     
+    async def similarity_search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int = 5
+    ) -> List[List[SearchResult]]:
+        """
+        Perform similarity search for several query embeddings at once.
+        
+        For collections up to exact_search_max_documents, every query is scored
+        against every stored document with a single matrix product. Larger
+        collections are searched through ChromaDB's HNSW index in one multi-query
+        call, avoiding an exhaustive scan. Metadata filters are not supported;
+        use similarity_search for filtered queries.
+        
+        Args:
+            query_embeddings: Query embedding vectors, one per query
+            top_k: Number of top results to return per query
+            
+        Returns:
+            One list of SearchResult objects per query, ranked by similarity
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        if len(query_embeddings) == 0:
+            return []
+        
+        try:
+            if self._collection.count() > self.exact_search_max_documents:
+                return self._approximate_search_batch(query_embeddings, top_k)
+            
+            self._load_doc_matrix()
+            if self._doc_matrix is None or len(self._doc_ids) == 0:
+                return [[] for _ in query_embeddings]
+            
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            distances = self._batch_distances(queries)
+            
+            # Select the top_k nearest documents per query, then order them
+            k = min(top_k, distances.shape[1])
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+            order = np.argsort(nearest_distances, axis=1)
+            nearest = np.take_along_axis(nearest, order, axis=1)
+            
+            batch_results = []
+            for row, doc_indices in enumerate(nearest):
+                batch_results.append([
+                    self._build_search_result(
+                        self._doc_ids[i],
+                        self._doc_contents[i],
+                        self._doc_metadatas[i],
+                        self._distance_to_similarity(float(distances[row, i]))
+                    )
+                    for i in doc_indices
+                ])
+            
+            logger.debug(f"Ran batch similarity search for {len(batch_results)} queries")
+            return batch_results
+            
+        except Exception as e:
+            raise VectorStoreError(f"Batch similarity search failed: {e}")
+    
+    def _approximate_search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        top_k: int
+    ) -> List[List[SearchResult]]:
+        """Search several queries through ChromaDB's HNSW index in one call."""
+        results = self._collection.query(
+            query_embeddings=list(query_embeddings),
+            n_results=min(top_k, 100),  # ChromaDB limit
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        batch_results = []
+        for ids, documents, metadatas, distances in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        ):
+            batch_results.append([
+                self._build_search_result(
+                    ids[i], documents[i], metadatas[i], self._distance_to_similarity(distances[i])
+                )
+                for i in range(len(ids))
+            ])
+        
+        return batch_results
+    
+    def _load_doc_matrix(self) -> None:
+        """
+        Load all stored embeddings into memory for batch search.
+        
+        The matrix is held as float16 to halve its memory footprint; scoring
+        promotes it back to float32, which keeps rankings stable for unit-norm
+        embeddings.
+        """
+        if self._doc_matrix is not None:
+            return
+        
+        results = self._collection.get(include=["documents", "metadatas", "embeddings"])
+        self._doc_ids = list(results["ids"] or [])
+        self._doc_contents = list(results["documents"] or [])
+        self._doc_metadatas = list(results["metadatas"] or [])
+        
+        embeddings = results["embeddings"]
+        if embeddings is None or len(embeddings) == 0:
+            self._doc_matrix = np.zeros((0, 0), dtype=np.float16)
+        else:
+            self._doc_matrix = np.asarray(embeddings, dtype=np.float16)
+    
+    def _batch_distances(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Compute ChromaDB-equivalent distances between queries and all documents.
+        
+        Args:
+            queries: Query matrix of shape (num_queries, dimension)
+            
+        Returns:
+            Distance matrix of shape (num_queries, num_documents)
+        """
+        scores = queries @ self._doc_matrix.T
+        
+        if self._distance_space == "ip":
+            return 1.0 - scores
+        
+        doc_norms = np.sqrt(
+            np.einsum("ij,ij->i", self._doc_matrix, self._doc_matrix, dtype=np.float32)
+        )
+        query_norms = np.linalg.norm(queries, axis=1)
+        
+        if self._distance_space == "cosine":
+            denominator = np.outer(query_norms, doc_norms)
+            return 1.0 - scores / np.where(denominator > 0, denominator, 1.0)
+        
+        # Squared L2 distance, as reported by ChromaDB
+        return query_norms[:, None] ** 2 + doc_norms[None, :] ** 2 - 2.0 * scores
+    
+    def _build_search_result(
+        self,
+        chunk_id: str,
+        document: str,
+        metadata: Dict[str, Any],
+        similarity_score: float
+    ) -> SearchResult:
+        """Create a SearchResult from raw ChromaDB fields."""
+        document_metadata = DocumentMetadata(
+            chunk_id=metadata["chunk_id"],
+            page_number=metadata["page_number"],
+            section_title=metadata["section_title"],
+            excerpt=document[:200] + "..." if len(document) > 200 else document,
+            document_source=metadata.get("document_source", "NG12 PDF")
+        )
+        
+        return SearchResult(
+            chunk_id=chunk_id,
+            content=document,
+            metadata=document_metadata,
+            similarity_score=similarity_score
+        )
+    
+    def _distance_to_similarity(self, distance: float) -> float:
+        """
+        Convert a ChromaDB distance into a similarity score.
+        
+        Args:
+            distance: Distance reported by ChromaDB for the collection's space
+            
+        Returns:
+            Similarity score (higher is more similar)
+        """
+        if self._distance_space in ("ip", "cosine"):
+            # ChromaDB reports 1 - dot product; for unit vectors this is cosine
+            return 1.0 - distance
+        
+        # Legacy L2 collections: similarity = 1 / (1 + distance)
+        # But we need to handle very small distances better
+        if distance < 0.001:
+            return 1.0 - distance  # For very small distances
+        return 1.0 / (1.0 + distance)
+    
     def get_document_by_id(self, chunk_id: str) -> Optional[SearchResult]:
         """
         Retrieve a specific document by its chunk ID.
@@ -333,7 +519,8 @@ class VectorStore:
             stats = {
                 "total_documents": count,
                 "collection_name": self.collection_name,
-                "store_path": str(self.store_path)
+                "store_path": str(self.store_path),
+                "distance_space": self._distance_space
             }
             
             if sample_results["metadatas"]:
@@ -0,0 +1,19 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture
+def patients_file(tmp_path):
+    """Copy of the sample patient data that tests may modify."""
+    path = tmp_path / "patients.json"
+    shutil.copyfile(DATA_DIR / "patients.json", path)
+    return path
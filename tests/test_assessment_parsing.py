@@ -0,0 +1,81 @@
+"""
+Tests for parsing Gemini assessment responses into structured sections.
+"""
+
+import pytest
+
+from src.assessment_engine import AssessmentEngine
+from src.gemini_agent import GeminiAgent
+
+
+NUMBERED_RESPONSE = """1. Assessment: Urgent Referral
+2. Reasoning: red flags present
+3. Citations: NG12 p5"""
+
+SINGLE_LINE_RESPONSE = (
+    "Assessment: Urgent Referral Reasoning: haemoptysis over 40 Citations: NG12 1.1.1"
+)
+
+BOLD_RESPONSE = """**Assessment:** Urgent Referral
+
+**Reasoning:** because
+
+**Citations:** [NG12 PDF, Page 5]"""
+
+
+@pytest.mark.parametrize(
+    "response, expected",
+    [
+        (
+            NUMBERED_RESPONSE,
+            {"assessment": "Urgent Referral", "reasoning": "red flags present", "citations": "NG12 p5"},
+        ),
+        (
+            SINGLE_LINE_RESPONSE,
+            {"assessment": "Urgent Referral", "reasoning": "haemoptysis over 40", "citations": "NG12 1.1.1"},
+        ),
+        (
+            BOLD_RESPONSE,
+            {"assessment": "Urgent Referral", "reasoning": "because", "citations": "[NG12 PDF, Page 5]"},
+        ),
+    ],
+    ids=["numbered", "single-line", "bold"],
+)
+def test_parse_assessment_shapes(response, expected):
+    assert GeminiAgent.parse_assessment(response) == expected
+
+
+def test_parse_assessment_keeps_numbers_inside_reasoning():
+    parsed = GeminiAgent.parse_assessment(
+        "Assessment: No Action\nReasoning: Score of 3.\nCitations: none"
+    )
+    
+    assert parsed["reasoning"] == "Score of 3."
+
+
+def test_parse_assessment_canonicalises_classification_case():
+    parsed = GeminiAgent.parse_assessment("assessment: urgent investigation\nreasoning: x")
+    
+    assert parsed["assessment"] == "Urgent Investigation"
+
+
+def test_parse_assessment_missing_sections():
+    assert GeminiAgent.parse_assessment("The model returned free text.") == {}
+
+
+def test_engine_falls_back_to_defaults():
+    engine = AssessmentEngine.__new__(AssessmentEngine)
+    
+    parsed = engine._parse_assessment_response("Assessment: Maybe later")
+    
+    assert parsed["assessment"] == "No Action"
+    assert parsed["reasoning"] == "Unable to parse assessment response"
+
+
+def test_engine_uses_parsed_sections():
+    engine = AssessmentEngine.__new__(AssessmentEngine)
+    
+    parsed = engine._parse_assessment_response(BOLD_RESPONSE)
+    
+    assert parsed["assessment"] == "Urgent Referral"
+    assert parsed["reasoning"] == "because"
@@ -0,0 +1,112 @@
+"""
+Tests for the /assess/batch endpoint, including NDJSON streaming.
+"""
+
+import asyncio
+
+import numpy as np
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from src.assessment_engine import AssessmentEngine
+from src.gemini_agent import GeminiAgent
+from src.main import app
+from src.patient_loader import PatientLoader
+from src.rag_pipeline import RAGPipeline
+
+
+class _EmbeddingService:
+    def __init__(self):
+        self.batches = []
+    
+    async def generate_embeddings_batch(self, texts, task_type):
+        self.batches.append(list(texts))
+        return [np.zeros(4, dtype=np.float32) for _ in texts]
+
+
+class _RAGPipeline:
+    """Guideline retrieval stand-in; PT-101 is slow so completion order differs from request order."""
+    
+    build_clinical_query = staticmethod(RAGPipeline.build_clinical_query)
+    
+    def __init__(self):
+        self.embedding_service = _EmbeddingService()
+    
+    async def build_clinical_context(self, patient_symptoms, patient_demographics, top_k, query_embedding=None):
+        if "unexplained hemoptysis" in patient_symptoms:
+            await asyncio.sleep(0.2)
+        excerpt = "Refer people using a suspected cancer pathway referral for lung cancer."
+        return {
+            "guideline_context": excerpt,
+            "citations": [{"source": "NG12 PDF", "page": 5, "chunk_id": "ng12_0005_00", "excerpt": excerpt * 20, "relevance_score": 0.9}],
+            "num_relevant_guidelines": 1,
+        }
+
+
+@pytest.fixture
+def client(patients_file):
+    rag_pipeline = _RAGPipeline()
+    app.state.assessment_engine = AssessmentEngine(
+        rag_pipeline=rag_pipeline,
+        patient_loader=PatientLoader(str(patients_file)),
+        gemini_agent=GeminiAgent(project_id="test", use_mock=True),
+    )
+    # No context manager: the lifespan would build the real components
+    yield TestClient(app), rag_pipeline
+    del app.state.assessment_engine
+
+
+def test_batch_returns_entries_in_request_order(client):
+    test_client, rag_pipeline = client
+    
+    response = test_client.post("/assess/batch", json={"patient_ids": ["PT-101", "NOPE", "PT-102"]})
+    
+    assert response.status_code == 200
+    entries = response.json()
+    assert [entry["patient_id"] for entry in entries] == ["PT-101", "NOPE", "PT-102"]
+    assert entries[1]["error_code"] == "HTTP_404"
+    assert entries[0]["assessment"] in ("Urgent Referral", "Urgent Investigation", "No Action")
+    # One embedding request covers the known patients
+    assert len(rag_pipeline.embedding_service.batches) == 1
+
+
+def test_batch_accepts_bare_list_and_rejects_empty(client):
+    test_client, _ = client
+    
+    assert len(test_client.post("/assess/batch", json=["PT-102"]).json()) == 1
+    assert test_client.post("/assess/batch", json=[]).status_code == 400
+
+
+def test_ndjson_streams_entries_in_completion_order(client):
+    test_client, rag_pipeline = client
+    
+    response = test_client.post(
+        "/assess/batch",
+        json={"patient_ids": ["PT-101", "PT-102", "NOPE"]},
+        headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers.get("content-encoding") == "identity"
+    entries = [orjson.loads(line) for line in response.content.splitlines()]
+    assert {entry["patient_id"] for entry in entries} == {"PT-101", "PT-102", "NOPE"}
+    # The slow patient finishes last
+    assert entries[-1]["patient_id"] == "PT-101"
+    assert next(e for e in entries if e["patient_id"] == "NOPE")["error_code"] == "HTTP_404"
+    # Streaming skips the up-front batch embedding
+    assert rag_pipeline.embedding_service.batches == []
+
+
+def test_json_batch_is_still_compressed(client):
+    test_client, _ = client
+    
+    response = test_client.post(
+        "/assess/batch",
+        json={"patient_ids": ["PT-101", "PT-102"]},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    
+    assert response.headers.get("content-encoding") == "gzip"
+    assert len(response.json()) == 2
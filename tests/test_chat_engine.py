@@ -0,0 +1,208 @@
+"""
+Tests for the chat engine, its semantic response cache and streamed answers.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import orjson
+from fastapi.testclient import TestClient
+
+from src.chat_engine import ChatEngine, SemanticResponseCache
+from src.gemini_agent import GeminiAgentError
+from src.main import app
+from src.models import ChatResponse, Citation, GeneratedResponse
+from src.rag_pipeline import RAGPipeline
+
+
+def _response(content, chunk_ids=("ng12_0005_00",), fallback=False):
+    citations = [
+        Citation(page=5, chunk_id=chunk_id, excerpt="excerpt", relevance_score=0.9)
+        for chunk_id in chunk_ids
+    ]
+    return GeneratedResponse(content=content, citations=citations, model_metadata={"fallback": fallback})
+
+
+class _EmbeddingService:
+    async def generate_query_embedding(self, text):
+        return np.ones(4, dtype=np.float32)
+
+
+class _RAGPipeline:
+    """Retrieval stand-in that records each generation request."""
+    
+    def __init__(self, responses):
+        self.vector_store = SimpleNamespace(version=0)
+        self.embedding_service = _EmbeddingService()
+        self.responses = list(responses)
+        self.generated = []
+        self.retrievals = 0
+    
+    async def retrieve_relevant_chunks(self, query, top_k, query_embedding=None):
+        self.retrievals += 1
+        return [SimpleNamespace(chunk_id="ng12_0005_00")]
+    
+    async def generate_chat_response(self, query, conversation_history=None, top_k=5, query_embedding=None, chunks=None):
+        if chunks is None:
+            await self.retrieve_relevant_chunks(query, top_k, query_embedding)
+        self.generated.append(query)
+        return self.responses.pop(0)
+    
+    async def stream_chat_response(self, query, conversation_history=None, top_k=5, query_embedding=None, chunks=None):
+        response = await self.generate_chat_response(query, conversation_history, top_k, query_embedding, chunks)
+        for word in response.content.split(" "):
+            yield word + " "
+        yield response
+
+
+def _ask(engine, session_id, message):
+    return asyncio.run(engine.process_chat_message(session_id, message))
+
+
+def test_opening_answer_is_reused_for_a_new_session():
+    rag_pipeline = _RAGPipeline([_response("first")])
+    engine = ChatEngine(rag_pipeline)
+    
+    assert _ask(engine, "s1", "lung referral?").answer == "first"
+    assert _ask(engine, "s2", "lung referral?").answer == "first"
+    
+    assert rag_pipeline.generated == ["lung referral?"]
+    assert engine.response_cache.hits == 1
+
+
+def test_mock_fallback_answer_is_not_cached():
+    rag_pipeline = _RAGPipeline([_response("mock", fallback=True), _response("real")])
+    engine = ChatEngine(rag_pipeline)
+    
+    assert _ask(engine, "s1", "lung referral?").answer == "mock"
+    assert _ask(engine, "s2", "lung referral?").answer == "real"
+    
+    assert len(engine.response_cache) == 1
+
+
+def test_rejected_candidate_reuses_verification_chunks():
+    rag_pipeline = _RAGPipeline([_response("first", chunk_ids=("ng12_0009_00",)), _response("second")])
+    engine = ChatEngine(rag_pipeline)
+    
+    _ask(engine, "s1", "lung referral?")
+    retrievals = rag_pipeline.retrievals
+    answer = _ask(engine, "s2", "lung referral?")
+    
+    assert answer.answer == "second"
+    assert engine.response_cache.rejected == 1
+    # One search verifies the candidate and grounds the new answer
+    assert rag_pipeline.retrievals == retrievals + 1
+    assert answer.timestamp.tzinfo is not None
+
+
+def _stream(engine, session_id, message):
+    async def collect():
+        return [item async for item in engine.stream_chat_message(session_id, message)]
+    
+    return asyncio.run(collect())
+
+
+def test_streamed_answer_is_recorded_and_cached():
+    rag_pipeline = _RAGPipeline([_response("refer within two weeks")])
+    engine = ChatEngine(rag_pipeline)
+    
+    *fragments, final = _stream(engine, "s1", "lung referral?")
+    assert fragments == ["refer ", "within ", "two ", "weeks "]
+    assert isinstance(final, ChatResponse) and final.answer == "refer within two weeks"
+    assert [message.role for message in engine.get_session_history("s1")] == ["user", "assistant"]
+    
+    # A cached answer arrives as a single fragment
+    assert _stream(engine, "s2", "lung referral?")[0] == "refer within two weeks"
+    assert rag_pipeline.generated == ["lung referral?"]
+
+
+def test_chat_endpoint_streams_ndjson():
+    app.state.chat_engine = ChatEngine(_RAGPipeline([_response("refer within two weeks")]))
+    try:
+        response = TestClient(app).post(
+            "/chat",
+            json={"session_id": "s1", "message": "lung referral?"},
+            headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+        )
+    finally:
+        del app.state.chat_engine
+    
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers.get("content-encoding") == "identity"
+    lines = [orjson.loads(line) for line in response.content.splitlines()]
+    assert "".join(line["delta"] for line in lines[:-1]) == "refer within two weeks "
+    assert lines[-1]["answer"] == "refer within two weeks"
+
+
+def test_pipeline_stream_falls_back_when_gemini_fails_before_any_text():
+    class _Agent:
+        async def generate_chat_response_stream(self, **kwargs):
+            raise GeminiAgentError("quota exceeded")
+            yield
+        
+        async def generate_chat_response_with_fallback(self, **kwargs):
+            return "mock answer", True
+    
+    pipeline = RAGPipeline(embedding_service=None, vector_store=None, gemini_agent=_Agent())
+    
+    async def collect():
+        return [item async for item in pipeline.stream_chat_response("lung referral?", chunks=[])]
+    
+    text, response = asyncio.run(collect())
+    assert text == "mock answer"
+    assert response.content == "mock answer"
+    assert response.model_metadata["fallback"]
+
+
+def _unit(angle):
+    """2-d unit vector at the given angle, so cosine similarity is cos(angle)."""
+    return np.array([np.cos(angle), np.sin(angle)], dtype=np.float32)
+
+
+def test_cache_hits_only_at_or_above_threshold():
+    cache = SemanticResponseCache(capacity=4, threshold=0.95)
+    cache.put(_unit(0.0), 5, _response("cached"))
+    
+    assert cache.get(_unit(np.arccos(0.97)), 5).content == "cached"
+    assert cache.get(_unit(np.arccos(0.90)), 5) is None
+    assert cache.misses == 1
+
+
+def test_cache_ignores_other_top_k_and_expired_entries():
+    cache = SemanticResponseCache(capacity=4, threshold=0.95, ttl=0.1)
+    cache.put(_unit(0.0), 5, _response("cached"))
+    
+    assert cache.get(_unit(0.0), 8) is None
+    assert cache.get(_unit(0.0), 5) is not None
+    time.sleep(0.15)
+    assert cache.get(_unit(0.0), 5) is None
+
+
+def test_cache_overwrites_oldest_entry_when_full():
+    cache = SemanticResponseCache(capacity=2, threshold=0.99)
+    for index, angle in enumerate((0.0, 1.0, 2.0)):
+        cache.put(_unit(angle), 5, _response(f"answer {index}"))
+    
+    assert len(cache) == 2
+    assert cache.get(_unit(0.0), 5) is None
+    assert cache.get(_unit(2.0), 5).content == "answer 2"
+
+
+def test_verify_requires_evidence_overlap():
+    cache = SemanticResponseCache(evidence_threshold=0.8)
+    candidate = _response("cached", chunk_ids=("a", "b", "c", "d"))
+    
+    # Jaccard 4/5 = 0.8 is accepted, 3/5 = 0.6 is rejected
+    assert cache.verify(candidate, {"a", "b", "c", "d", "e"})
+    assert not cache.verify(candidate, {"a", "b", "c", "e"})
+    assert (cache.hits, cache.rejected) == (1, 1)
+
+
+def test_cache_ignores_entries_from_other_corpus_versions():
+    cache = SemanticResponseCache(capacity=4, threshold=0.95)
+    cache.put(_unit(0.0), 5, _response("cached"), version=1)
+    
+    assert cache.get(_unit(0.0), 5, version=2) is None
+    assert cache.get(_unit(0.0), 5, version=1) is not None
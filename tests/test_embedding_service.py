@@ -0,0 +1,96 @@
+"""
+Tests for EmbeddingService request batching and caching, with the predict call replaced by a stub.
+"""
+
+import asyncio
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from src.embedding_service import EmbeddingService, _WINDOW_CHARS
+
+
+@pytest.fixture
+def service():
+    service = EmbeddingService(project_id="test", use_mock=True, cache_size=100)
+    # Past initialization, so the real embedding paths run against the stub
+    service.use_mock = False
+    service.requests = []
+    
+    async def predict(texts, task_type):
+        service.requests.append(len(texts))
+        return np.tile(np.eye(1, 8, dtype=np.float32), (len(texts), 1))
+    
+    service._predict_embeddings = predict
+    return service
+
+
+def test_long_text_windows_are_sent_in_batches(service):
+    long_text = " ".join(["haemoptysis"] * (_WINDOW_CHARS * 8 // 12))
+    
+    embedding = asyncio.run(service.generate_embedding(long_text))
+    
+    assert sum(service.requests) > 5
+    assert max(service.requests) <= 5
+    assert embedding.shape == (8,)
+
+
+def test_cache_key_depends_on_model(service):
+    other = EmbeddingService(project_id="test", use_mock=True, model_name="text-embedding-005")
+    
+    assert service._cache_key("cough", "RETRIEVAL_QUERY") != other._cache_key("cough", "RETRIEVAL_QUERY")
+
+
+@pytest.mark.parametrize("tier", ["memory", "disk"])
+def test_cache_hits_are_private_writable_copies(tmp_path, tier):
+    service = EmbeddingService(
+        project_id="test",
+        use_mock=True,
+        cache_size=100 if tier == "memory" else 0,
+        cache_path=str(tmp_path / "embeddings"),
+    )
+    key = service._cache_key("cough", "RETRIEVAL_QUERY")
+    service._cache_put(key, np.ones(service.get_embedding_dimension(), dtype=np.float32))
+    
+    first = service._cache_get(key)
+    first[0] = 0.0
+    
+    assert first.flags.writeable
+    assert service._cache_get(key)[0] == 1.0
+    service.close()
+
+
+def test_disk_cache_does_not_keep_service_alive(tmp_path):
+    service = EmbeddingService(project_id="test", use_mock=True, cache_path=str(tmp_path / "embeddings"))
+    key = service._cache_key("cough", "RETRIEVAL_QUERY")
+    service._cache_put(key, np.ones(service.get_embedding_dimension(), dtype=np.float32))
+    alive = weakref.ref(service)
+    
+    del service
+    gc.collect()
+    
+    assert alive() is None
+    # The file was closed on collection, so it can be reopened with the entry intact
+    reopened = EmbeddingService(project_id="test", use_mock=True, cache_size=0, cache_path=str(tmp_path / "embeddings"))
+    assert reopened._cache_get(key) is not None
+    reopened.close()
+
+
+def test_disk_cache_stores_half_precision(tmp_path):
+    service = EmbeddingService(project_id="test", use_mock=True, cache_size=0, cache_path=str(tmp_path / "embeddings"))
+    dimension = service.get_embedding_dimension()
+    embedding = np.random.default_rng(0).uniform(-1.0, 1.0, dimension).astype(np.float32)
+    key = service._cache_key("cough", "RETRIEVAL_QUERY")
+    service._cache_put(key, embedding)
+    
+    assert len(service._disk_cache[key]) == dimension * 2
+    cached = service._cache_get(key)
+    assert cached.dtype == np.float32
+    np.testing.assert_allclose(cached, embedding, atol=1e-3)
+    
+    # An entry in the old float32 layout is treated as a miss
+    service._disk_cache[key] = embedding.tobytes()
+    assert service._cache_get(key) is None
+    service.close()
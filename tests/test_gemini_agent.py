@@ -0,0 +1,112 @@
+"""
+Tests for GeminiAgent response and tool caching, with the model call replaced by a counter.
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from src.gemini_agent import GeminiAgent
+from src.models import PatientRecord
+from src.patient_loader import PatientLoader
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PATIENT = PatientRecord(
+    patient_id="PT-101",
+    name="John Doe",
+    age=55,
+    gender="Male",
+    smoking_history="Current Smoker",
+    symptoms=("unexplained hemoptysis", "fatigue"),
+    symptom_duration_days=14,
+)
+
+
+@pytest.fixture
+def agent():
+    agent = GeminiAgent(project_id="test", use_mock=True, response_cache_ttl=0.2)
+    # Past initialization, so the real generation paths run against the stub
+    agent.use_mock = False
+    agent.model_calls = 0
+    
+    async def stream_response(prompt):
+        agent.model_calls += 1
+        yield f"Assessment: No Action\nReasoning: call {agent.model_calls}"
+    
+    agent._stream_response = stream_response
+    return agent
+
+
+def test_assessments_are_never_served_from_cache(agent):
+    async def assess_twice():
+        for _ in range(2):
+            await agent.generate_clinical_assessment("PT-101", "guidelines", patient=PATIENT)
+    
+    asyncio.run(assess_twice())
+    
+    assert agent.model_calls == 2
+    assert len(agent._response_cache) == 0
+
+
+def test_chat_responses_are_cached_until_ttl(agent):
+    async def ask():
+        return await agent.generate_chat_response("referral?", "guidelines")
+    
+    first = asyncio.run(ask())
+    assert asyncio.run(ask()) == first
+    assert agent.model_calls == 1
+    
+    time.sleep(0.25)
+    asyncio.run(ask())
+    assert agent.model_calls == 2
+
+
+def test_chat_fallback_is_reported(agent):
+    async def failing_stream(prompt):
+        raise RuntimeError("quota exceeded")
+        yield
+    
+    agent._stream_response = failing_stream
+    
+    response, fallback = asyncio.run(
+        agent.generate_chat_response_with_fallback("referral?", "guidelines")
+    )
+    
+    assert fallback
+    assert asyncio.run(agent.generate_chat_response("referral?", "guidelines")) == response
+
+
+def test_tool_prefers_passed_record_and_clears_on_reload(patients_file):
+    loader = PatientLoader(str(patients_file))
+    loader.prime_cache()
+    agent = GeminiAgent(project_id="test", use_mock=True)
+    agent.set_patient_loader(loader)
+    
+    assert agent._cached_get_patient("PT-101")["age"] == 55
+    updated = PATIENT.model_copy(update={"age": 56})
+    assert agent._cached_get_patient("PT-101", updated)["age"] == 56
+    
+    agent._tool_caches["get_patient_data"]["PT-101"] = {"patient_id": "PT-101", "age": 0}
+    loader.reload_data()
+    loader.prime_cache()
+    assert agent._cached_get_patient("PT-101")["age"] == 55
+
+
+def test_model_info_does_not_import_the_sdk():
+    # Run in a fresh interpreter, since other tests may have imported the SDK
+    script = (
+        "import sys\n"
+        "from src.gemini_agent import GeminiAgent\n"
+        "info = GeminiAgent(project_id='test', use_mock=True).get_model_info()\n"
+        "assert info['temperature'] == 0.1 and info['safety_settings_count'] == 4\n"
+        "assert 'vertexai' not in sys.modules\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+    
+    assert result.returncode == 0, result.stderr
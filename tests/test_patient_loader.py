@@ -0,0 +1,59 @@
+"""
+Tests for patient loading from the validated snapshot.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from src.patient_loader import PatientLoader
+
+
+def _loads_snapshot(patients_file, monkeypatch):
+    loader = PatientLoader(str(patients_file))
+    validated = []
+    original = loader._write_snapshot
+    monkeypatch.setattr(loader, "_write_snapshot", lambda *args: validated.append(1) or original(*args))
+    patients = loader.get_all_patients()
+    return patients, not validated
+
+
+def test_snapshot_is_used_for_unchanged_file(patients_file, monkeypatch):
+    first, _ = _loads_snapshot(patients_file, monkeypatch)
+    second, from_snapshot = _loads_snapshot(patients_file, monkeypatch)
+    
+    assert from_snapshot
+    assert second == first
+
+
+def test_snapshot_rejected_when_content_changes_with_same_mtime(patients_file, monkeypatch):
+    _loads_snapshot(patients_file, monkeypatch)
+    stat = patients_file.stat()
+    patients_file.write_bytes(patients_file.read_bytes().replace(b'"age": 55', b'"age": 56'))
+    os.utime(patients_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    
+    patients, from_snapshot = _loads_snapshot(patients_file, monkeypatch)
+    
+    assert not from_snapshot
+    assert next(p for p in patients if p.patient_id == "PT-101").age == 56
+
+
+def test_snapshot_rejected_for_other_schema(patients_file, monkeypatch):
+    _loads_snapshot(patients_file, monkeypatch)
+    monkeypatch.setattr("src.patient_loader._SNAPSHOT_SCHEMA", "older-schema")
+    
+    _, from_snapshot = _loads_snapshot(patients_file, monkeypatch)
+    
+    assert not from_snapshot
+
+
+def test_health_check_does_not_reload(patients_file, monkeypatch):
+    loader = PatientLoader(str(patients_file))
+    assert asyncio.run(loader.health_check())
+    
+    loader.prime_cache()
+    monkeypatch.setattr(loader, "_load_patients_data", lambda: pytest.fail("health check reloaded the file"))
+    assert asyncio.run(loader.health_check())
+    
+    assert not asyncio.run(PatientLoader(str(patients_file.with_name("missing.json"))).health_check())
@@ -0,0 +1,236 @@
+"""
+Tests for PDF text processing and the extracted chunk cache.
+"""
+
+import json
+import random
+import re
+
+import pytest
+
+from src import pdf_parser
+from src.models import TextChunk
+from src.pdf_parser import PDFParser
+
+
+PAGE_TEXT = (
+    "1.1 Lung cancer\n\n"
+    "Refer people using a suspected cancer pathway referral for lung cancer if they "
+    "have chest X-ray findings that suggest lung cancer or are aged 40 and over with "
+    "unexplained haemoptysis."
+)
+
+
+def _parser(tmp_path, pdftotext, extractions, pdftotext_fails=False):
+    pdf_path = tmp_path / "ng12.pdf"
+    if not pdf_path.exists():
+        pdf_path.write_bytes(b"%PDF-1.4 test document")
+    parser = PDFParser(pdf_path=str(pdf_path), download_dir=str(tmp_path))
+    parser._pdftotext = pdftotext
+    
+    def extract_page_texts():
+        extractor = parser._extractor_order()[-1 if pdftotext_fails else 0]
+        extractions.append(extractor)
+        return extractor, [PAGE_TEXT]
+    
+    parser._extract_page_texts = extract_page_texts
+    return parser
+
+
+def test_chunk_cache_is_reused_for_the_same_extractor(tmp_path):
+    extractions = []
+    first = _parser(tmp_path, "/usr/bin/pdftotext", extractions).extract_text_with_metadata()
+    second = _parser(tmp_path, "/usr/bin/pdftotext", extractions).extract_text_with_metadata()
+    
+    assert extractions == ["pdftotext"]
+    assert second == first
+
+
+def test_chunk_cache_is_keyed_by_extractor(tmp_path):
+    extractions = []
+    _parser(tmp_path, "/usr/bin/pdftotext", extractions).extract_text_with_metadata()
+    _parser(tmp_path, None, extractions).extract_text_with_metadata()
+    
+    assert extractions[0] == "pdftotext"
+    assert extractions[1] in ("pymupdf", "pypdf2")
+    assert len(list(tmp_path.glob("chunks_v*.json"))) == 2
+
+
+def test_chunk_cache_is_found_after_pdftotext_fell_back(tmp_path):
+    extractions = []
+    first = _parser(tmp_path, "/usr/bin/pdftotext", extractions, pdftotext_fails=True).extract_text_with_metadata()
+    second = _parser(tmp_path, "/usr/bin/pdftotext", extractions, pdftotext_fails=True).extract_text_with_metadata()
+    
+    assert extractions in (["pymupdf"], ["pypdf2"])
+    assert second == first
+
+
+def test_pdftotext_timeout_falls_back_to_python_extraction(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "ng12.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 test document")
+    parser = PDFParser(pdf_path=str(pdf_path), download_dir=str(tmp_path))
+    parser._pdftotext = "/usr/bin/pdftotext"
+    
+    def hung_pdftotext(args, **kwargs):
+        raise pdf_parser.subprocess.TimeoutExpired(args, kwargs["timeout"])
+    
+    monkeypatch.setattr(pdf_parser.subprocess, "run", hung_pdftotext)
+    monkeypatch.setattr(pdf_parser, "_count_pages", lambda path: 1)
+    monkeypatch.setattr(pdf_parser, "_extract_page_range", lambda path, start, stop: [PAGE_TEXT])
+    
+    extractor, page_texts = parser._extract_page_texts()
+    
+    assert extractor == pdf_parser._PYTHON_EXTRACTOR
+    assert page_texts == [PAGE_TEXT]
+
+
+def test_save_chunks_writes_a_json_array_by_default(tmp_path):
+    parser = _parser(tmp_path, None, [])
+    chunks = parser.extract_text_with_metadata()
+    output_path = tmp_path / "chunks.json"
+    
+    parser.save_chunks_to_file(str(output_path))
+    
+    saved = json.loads(output_path.read_text(encoding="utf-8"))
+    assert [chunk["chunk_id"] for chunk in saved] == [chunk.chunk_id for chunk in chunks]
+    assert output_path.read_text(encoding="utf-8").startswith("[\n  {")
+
+
+@pytest.mark.parametrize("name, jsonl", [("chunks.json", True), ("chunks.jsonl", False)])
+def test_save_chunks_writes_jsonl_when_asked(tmp_path, name, jsonl):
+    parser = _parser(tmp_path, None, [])
+    chunks = parser.extract_text_with_metadata()
+    output_path = tmp_path / name
+    
+    parser.save_chunks_to_file(str(output_path), jsonl=jsonl)
+    
+    lines = output_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["chunk_id"] for line in lines] == [chunk.chunk_id for chunk in chunks]
+
+
+# Reference implementations of the original text processing, which the
+# optimised parser must reproduce exactly
+
+def _baseline_clean_text(text):
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'NICE guideline.*?\n', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'Page \d+ of \d+', '', text, flags=re.IGNORECASE)
+    text = text.replace('\ufb01', 'fi')
+    text = text.replace('\ufb02', 'fl')
+    text = text.replace('\u2019', "'")
+    text = text.replace('\u201c', '"')
+    text = text.replace('\u201d', '"')
+    return text.strip()
+
+
+def _baseline_section_title(text):
+    patterns = [
+        r'^(\d+\.?\d*\s+[A-Z][^.\n]{10,60})',
+        r'^([A-Z][A-Z\s]{5,40})\n',
+        r'(Recommendation \d+\.?\d*)',
+        r'(Clinical question \d+\.?\d*)',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            return match.group(1).strip()
+    first_line = text.split('\n')[0].strip()
+    if len(first_line) < 100 and first_line:
+        return first_line
+    return "NG12 Guidelines"
+
+
+def _baseline_chunk_text(text, page_num, clean_text=_baseline_clean_text):
+    chunks = []
+    text = clean_text(text)
+    if not text.strip():
+        return chunks
+    section_title = _baseline_section_title(text)
+    paragraphs = re.split(r'\n\s*\n|\n\s*[\u2022\u00b7\u25aa\u25ab]\s*', text)
+    paragraphs = [p.strip() for p in paragraphs if len(p.strip()) > 20]
+    current_chunk = ""
+    chunk_start = 0
+    chunk_count = 0
+    for paragraph in paragraphs:
+        if len(current_chunk) + len(paragraph) > 1200 and current_chunk:
+            chunk_count += 1
+            chunks.append(TextChunk(
+                chunk_id=f"ng12_{page_num:04d}_{chunk_count:02d}",
+                content=current_chunk.strip(),
+                page_number=page_num,
+                section_title=section_title,
+                start_char=chunk_start,
+                end_char=chunk_start + len(current_chunk)
+            ))
+            overlap_text = current_chunk[-200:] if len(current_chunk) > 200 else current_chunk
+            current_chunk = overlap_text + "\n" + paragraph
+            chunk_start += len(current_chunk) - len(overlap_text) - len(paragraph) - 1
+        elif current_chunk:
+            current_chunk += "\n" + paragraph
+        else:
+            current_chunk = paragraph
+    if current_chunk.strip():
+        chunk_count += 1
+        chunks.append(TextChunk(
+            chunk_id=f"ng12_{page_num:04d}_{chunk_count:02d}",
+            content=current_chunk.strip(),
+            page_number=page_num,
+            section_title=section_title,
+            start_char=chunk_start,
+            end_char=chunk_start + len(current_chunk)
+        ))
+    return chunks
+
+
+# Fragments that exercise every cleaning rule, title pattern and paragraph separator
+_FRAGMENTS = (
+    "a", "b", "Z", "7", "1.2", " ", "  ", "\t", "\n", "\n\n", "\n \n", "\r\n", "\f", "\xa0",
+    "\u2022 ", "\n\u2022 ", "\n\u00b7", "\n\u25aa ", "\n\u25ab",
+    "\ufb01", "\ufb02", "\u2019", "\u201c", "\u201d", ".",
+    "NICE guideline", "nice GUIDELINE [NG12]", "Page 3 of 10", "page 12 OF 140",
+    "Recommendation 1.3", "Clinical question 2", "LUNG AND PLEURAL CANCERS",
+    "1.1 Lung cancer referral criteria", "haemoptysis", "Refer people using a suspected cancer pathway",
+)
+
+
+def _random_pages(seed, count, max_fragments):
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(0, max_fragments)))
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return PDFParser(pdf_path=str(tmp_path / "ng12.pdf"), download_dir=str(tmp_path))
+
+
+def test_clean_text_matches_baseline(parser):
+    for text in _random_pages(seed=1, count=3000, max_fragments=40):
+        assert parser._clean_text(text) == _baseline_clean_text(text), repr(text)
+
+
+def test_section_title_matches_baseline(parser):
+    for text in _random_pages(seed=2, count=3000, max_fragments=30):
+        assert parser._extract_section_title(text) == _baseline_section_title(text), repr(text)
+
+
+def test_chunk_text_matches_baseline(parser):
+    for text in _random_pages(seed=3, count=300, max_fragments=400):
+        assert parser._chunk_text(text, 3) == _baseline_chunk_text(text, 3), repr(text)
+
+
+def test_paragraph_chunking_matches_baseline(parser, monkeypatch):
+    # Cleaning joins a page into one line, so bypass it to exercise paragraph
+    # splitting, chunk boundaries and overlaps
+    monkeypatch.setattr(parser, "_clean_text", lambda text: text)
+    rng = random.Random(4)
+    for _ in range(300):
+        paragraphs = [
+            "".join(rng.choice("abc def ghi\u2022.") for _ in range(rng.randint(0, 900)))
+            for _ in range(rng.randint(0, 12))
+        ]
+        text = "\n\n".join(paragraphs)
+        expected = _baseline_chunk_text(text, 3, clean_text=lambda t: t)
+        assert parser._chunk_text(text, 3) == expected, repr(text)